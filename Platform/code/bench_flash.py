@@ -0,0 +1,74 @@
+import sys
+from random import random, seed
+from time import perf_counter
+
+from settings import *
+from imports import import_spritestrip_animation
+from sprites import Bee
+
+# python bench_flash.py [frames] [bee counts...]
+# Frame time of drawing bees, a quarter of them flashing, in a hidden window without vsync.
+# 'per enemy' is how Enemy.draw used to do it: a uniform buffer, an upload and a shader pass for every bee.
+# 'batched' is Game.draw now: bees that are not flashing in the normal batch, flashing ones in one shader pass.
+
+FLASHING_SHARE = 0.25
+
+def draw_per_enemy(bees: list, shader: Shader, flash_loc: int):
+    for bee in bees:
+        flash_val = ffi.new("float[2]", [1.0 if bee.flashing else 0.0, 0.0])
+        set_shader_value(shader, flash_loc, flash_val, SHADER_UNIFORM_VEC2)
+        begin_shader_mode(shader)
+        bee.draw(False)
+        end_shader_mode()
+
+def draw_batched(bees: list, shader: Shader, flash_loc: int, flash_value):
+    flashing = []
+    for bee in bees:
+        if bee.flashing:
+            flashing.append(bee)
+        else:
+            bee.draw(False)
+    if flashing:
+        # The uniform is set again here because draw_per_enemy changes it, Game sets it once at startup
+        set_shader_value(shader, flash_loc, flash_value, SHADER_UNIFORM_VEC2)
+        begin_shader_mode(shader)
+        for bee in flashing:
+            bee.draw(False)
+        end_shader_mode()
+
+def bench(draw, frames: int) -> float:
+    start = perf_counter()
+    for _ in range(frames):
+        begin_drawing()
+        clear_background(BG_COLOR)
+        draw()
+        end_drawing()
+    return (perf_counter() - start) / frames * 1000
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    counts = [int(count) for count in sys.argv[2:]] or [100, 500, 1000, 2000]
+
+    set_config_flags(FLAG_WINDOW_HIDDEN)
+    init_window(WINDOW_WIDTH, WINDOW_HEIGHT, 'bench_flash')
+    shader = load_shader(ffi.NULL, '../shaders/flash.glsl')
+    flash_loc = get_shader_location(shader, 'flash')
+    flash_value = ffi.new("float[2]", [1.0, 0.0])
+    tex, bee_frames = import_spritestrip_animation(40, '../images/enemies/bee/bee_spritesheet')
+
+    print(f'{"bees":>6} {"per enemy ms/frame":>19} {"batched ms/frame":>17}')
+    for bee_count in counts:
+        seed(0)
+        bees = []
+        for _ in range(bee_count):
+            bee = Bee(tex, bee_frames, Vector2(random() * WINDOW_WIDTH, random() * WINDOW_HEIGHT), 0)
+            if random() < FLASHING_SHARE:
+                bee.destroy()   # Flashes until its death timer runs out, which never happens without updates
+            bees.append(bee)
+        per_enemy = bench(lambda: draw_per_enemy(bees, shader, flash_loc), frames)
+        batched = bench(lambda: draw_batched(bees, shader, flash_loc, flash_value), frames)
+        print(f'{bee_count:6} {per_enemy:19.2f} {batched:17.2f}')
+
+    unload_shader(shader)
+    unload_texture(tex)
+    close_window()
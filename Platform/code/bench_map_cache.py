@@ -0,0 +1,46 @@
+import os
+import sys
+from statistics import median
+from time import perf_counter
+
+from map_cache import load_map, TileLayer
+
+# python bench_map_cache.py [runs]
+# Startup cost of reading world.tmx: parsed with pytmx like the game used to, compiled into a fresh
+# cache, and loaded from the cache. Every run also walks all tile layers, like setup() does.
+
+MAP_PATH = '../data/maps/world.tmx'
+
+def parse_with_pytmx():
+    from pytmx import TiledMap, TiledTileLayer
+    tmx_data = TiledMap(MAP_PATH)
+    for layer in tmx_data.layers:
+        if isinstance(layer, TiledTileLayer):
+            for _ in layer.tiles():
+                pass
+
+def load_from_cache():
+    compiled_map = load_map(MAP_PATH)
+    for layer in compiled_map.layers.values():
+        if isinstance(layer, TileLayer):
+            for _ in layer.tiles():
+                pass
+
+def compile_cache():
+    if os.path.exists(MAP_PATH + '.cache'):
+        os.remove(MAP_PATH + '.cache')
+    load_from_cache()
+
+def time_runs(func, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = perf_counter()
+        func()
+        times.append(perf_counter() - start)
+    return median(times)
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    parse_with_pytmx()   # The first pytmx import is not part of a load
+    for name, func in (('pytmx', parse_with_pytmx), ('cache compile', compile_cache), ('cache load', load_from_cache)):
+        print(f'{name:14} {time_runs(func, runs) * 1000:8.2f} ms (median of {runs})')
@@ -0,0 +1,63 @@
+import sys
+from random import random, seed
+from time import perf_counter
+
+from pytmx import TiledMap
+
+from settings import *
+from sprites import Tile
+from tile_grid import TileGrid
+
+# python bench_tile_grid.py [ticks] [scales...]
+# Player collision cost per tick on world.tmx with the Main layer repeated scale times across and down.
+# A tick is what the player does: a collision pass per axis and a floor check, through the grid
+# and through the linear scan over every tile the player used before.
+
+HITBOX = (44, 54)   # About the size of the player hitbox, in px
+
+def build(scale: int) -> tuple[list, TileGrid]:
+    tmx_data = TiledMap('../data/maps/world.tmx')
+    main_tiles = [(x, y, Rectangle(*rect)) for x, y, (filename, rect, flags) in tmx_data.get_layer_by_name('Main').tiles()]
+    tiles, grid = [], TileGrid(tmx_data.width * scale, tmx_data.height * scale)
+    for copy_x in range(scale):
+        for copy_y in range(scale):
+            for x, y, source_rect in main_tiles:
+                x, y = x + copy_x * tmx_data.width, y + copy_y * tmx_data.height
+                tile = Tile(Rectangle(x * TILE_SIZE, y * TILE_SIZE, source_rect.width, source_rect.height), source_rect)
+                tiles.append(tile)
+                grid.add(x, y, tile)
+    return tiles, grid
+
+def scan_tick(tiles: list, hitbox: Rectangle, floor: Rectangle):
+    for _ in range(2):
+        for tile in tiles:
+            check_collision_recs(hitbox, tile.dest)
+    for tile in tiles:
+        if check_collision_recs(floor, tile.dest):
+            break
+
+def grid_tick(grid: TileGrid, hitbox: Rectangle, floor: Rectangle):
+    for _ in range(2):
+        for tile in grid.query(hitbox):
+            check_collision_recs(hitbox, tile.dest)
+    grid.collides(floor)
+
+def bench(tick, index, rects: list) -> float:
+    start = perf_counter()
+    for hitbox, floor in rects:
+        tick(index, hitbox, floor)
+    return (perf_counter() - start) / len(rects) * 1e6
+
+if __name__ == '__main__':
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    scales = [int(scale) for scale in sys.argv[2:]] or [1, 2, 4]
+    print(f'{"area":>5} {"tiles":>7} {"scan us/tick":>13} {"grid us/tick":>13}')
+    for scale in scales:
+        seed(0)
+        tiles, grid = build(scale)
+        width, height = grid.width * TILE_SIZE, grid.height * TILE_SIZE
+        rects = []
+        for _ in range(ticks):
+            x, y = random() * (width - HITBOX[0]), random() * (height - HITBOX[1])
+            rects.append((Rectangle(x, y, *HITBOX), Rectangle(x, y + HITBOX[1], HITBOX[0], 2)))
+        print(f'{scale * scale:4}x {len(tiles):7} {bench(scan_tick, tiles, rects):13.1f} {bench(grid_tick, grid, rects):13.1f}')
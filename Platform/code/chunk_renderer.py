@@ -0,0 +1,51 @@
+from math import ceil
+from settings import *
+
+class ChunkRenderer:
+    def __init__(self, tileset: Texture, level_width: int, level_height: int, chunk_size: int = CHUNK_SIZE):
+        self.tileset = tileset
+        self.chunk_pixels = chunk_size * TILE_SIZE
+        self.columns = ceil(level_width / self.chunk_pixels)
+        self.rows = ceil(level_height / self.chunk_pixels)
+
+        # (column, row) -> (render texture, position in the world)
+        self.chunks = {}
+        # Render textures are stored upside down, so the source height is negative
+        self.source = Rectangle(0, 0, self.chunk_pixels, -self.chunk_pixels)
+
+    def bake(self, tiles: list):
+        """Draw the tiles once into chunk textures. Later tiles are drawn on top of earlier ones."""
+        chunk_tiles = {}
+        for tile in tiles:
+            key = (int(tile.dest.x // self.chunk_pixels), int(tile.dest.y // self.chunk_pixels))
+            chunk_tiles.setdefault(key, []).append(tile)
+
+        for (column, row), tiles_in_chunk in chunk_tiles.items():
+            offset = Vector2(column * self.chunk_pixels, row * self.chunk_pixels)
+            target = load_render_texture(self.chunk_pixels, self.chunk_pixels)
+
+            begin_texture_mode(target)
+            clear_background(BLANK)
+            for tile in tiles_in_chunk:
+                dest = Rectangle(tile.dest.x - offset.x, tile.dest.y - offset.y, tile.dest.width, tile.dest.height)
+                draw_texture_pro(self.tileset, tile.source, dest, Vector2(), 0, WHITE)
+            end_texture_mode()
+
+            self.chunks[(column, row)] = (target, offset)
+
+    def draw(self, view: Rectangle):
+        left = max(int(view.x // self.chunk_pixels), 0)
+        top = max(int(view.y // self.chunk_pixels), 0)
+        right = min(int((view.x + view.width) // self.chunk_pixels), self.columns - 1)
+        bottom = min(int((view.y + view.height) // self.chunk_pixels), self.rows - 1)
+
+        for row in range(top, bottom + 1):
+            for column in range(left, right + 1):
+                chunk = self.chunks.get((column, row))
+                if chunk:
+                    draw_texture_rec(chunk[0].texture, self.source, chunk[1], WHITE)
+
+    def unload(self):
+        for target, _ in self.chunks.values():
+            unload_render_texture(target)
+        self.chunks.clear()
@@ -1,35 +1,44 @@
 import json
+import runtime
 from settings import *
 
-def import_spritesheet_animation(*path: str) -> tuple[Texture, dict[str, list[Rectangle]]]:
-    path = join(*path)
-    spritesheet = load_texture(path + '.png')
-    frames = {}
-    with open(path + '.json') as file:
-        data = json.load(file)
+# Every sheet is loaded once. Frame tables are tuples shared by all sprites using them, never change them
+animations = {}
+frame_tables = {}
 
-    all_frames = list(data['frames'])
-    for tag in data['meta']['frameTags']:
-        animation_frames = []
-        tag_name = tag['name']
-        start, end = tag['from'], tag['to']
-        for i in range(start, end + 1):
-            data = all_frames[i]
-            frame = data['frame']
-            source = Rectangle(frame['x'], frame['y'], frame['w'], frame['h'])
-            animation_frames.append(source)
-        frames[tag_name] = animation_frames
-    return spritesheet, frames
+def load_frame_tables(json_path: str) -> dict[str, tuple[Rectangle, ...]]:
+    """Frame rects for each animation tag of an Aseprite sheet, parsed on the first call for json_path."""
+    if json_path not in frame_tables:
+        with open(json_path) as file:
+            data = json.load(file)
 
-def import_spritestrip_animation(frame_width, *path: str) -> tuple[Texture, list[Rectangle]]:
-    path = join(*path)
-    spritestrip = load_texture(path + '.png')
-    frames_amount = int(spritestrip.width / frame_width)
+        # Aseprite exports frames either as an array or as a name -> frame hash
+        all_frames = data['frames'] if isinstance(data['frames'], list) else list(data['frames'].values())
+        tables = {}
+        for tag in data['meta']['frameTags']:
+            frames = [all_frames[i]['frame'] for i in range(tag['from'], tag['to'] + 1)]
+            tables[tag['name']] = tuple(Rectangle(frame['x'], frame['y'], frame['w'], frame['h']) for frame in frames)
+        frame_tables[json_path] = tables
+    return frame_tables[json_path]
 
-    frames_source = []
-    for i in range(frames_amount):
-        source = Rectangle(i * frame_width, i * spritestrip.height, frame_width, spritestrip.height)
-        frames_source.append(source)
+def strip_frames(frame_width: float, frame_height: float, count: int, x: float = 0, y: float = 0) -> tuple[Rectangle, ...]:
+    """Rects of count frames laid side by side from (x, y)."""
+    key = (x, y, frame_width, frame_height, count)
+    if key not in frame_tables:
+        frame_tables[key] = tuple(Rectangle(x + i * frame_width, y, frame_width, frame_height) for i in range(count))
+    return frame_tables[key]
 
-    return spritestrip, frames_source
+def import_spritesheet_animation(*path: str) -> tuple[Texture, dict[str, tuple[Rectangle, ...]]]:
+    path = join(*path)
+    if path not in animations:
+        spritesheet = runtime.load_texture_asset(path + '.png')
+        animations[path] = (spritesheet, load_frame_tables(path + '.json'))
+    return animations[path]
 
+def import_spritestrip_animation(frame_width, *path: str) -> tuple[Texture, tuple[Rectangle, ...]]:
+    path = join(*path)
+    if path not in animations:
+        spritestrip = runtime.load_texture_asset(path + '.png')
+        frames_amount = int(spritestrip.width / frame_width)
+        animations[path] = (spritestrip, strip_frames(frame_width, spritestrip.height, frames_amount))
+    return animations[path]
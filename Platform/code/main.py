@@ -1,38 +1,77 @@
-from timer import Timer
+import sys
+from time import perf_counter
+import runtime
+from runtime import ScriptedInput
+from timer import Timer, scheduler
+from fixed_step import FixedStep, store_positions, interpolated
 from settings import *
-from pytmx import TiledMap
+from map_cache import load_map
 from sprites import Tile, Player, Bee, Worm, Bullet, Fire
+from tile_grid import TileGrid
+from spatial_hash import SpatialHash
+from pool import Pool, remove_discarded
+from chunk_renderer import ChunkRenderer
+from spawn_director import SpawnDirector
+from particles import ParticleSystem, ParticleEmitter
+from registry import Registry
+from utilities import get_camera_view
 from imports import import_spritesheet_animation, import_spritestrip_animation
 
 class Game:
-    def __init__(self):
-        init_window(WINDOW_WIDTH, WINDOW_HEIGHT, 'Platformer')
+    def __init__(self, headless: bool = False, controls: ScriptedInput | None = None):
+        # Headless games have no window, use a virtual clock and scripted input and are never drawn
+        self.headless = headless
+        if headless:
+            runtime.start_headless(controls)
+        else:
+            init_window(WINDOW_WIDTH, WINDOW_HEIGHT, 'Platformer')
         self.running = True
         self.debug = False
+        self.drawn_sprites = 0
+        self.culled_sprites = 0
 
         self.assets = {
-            'tilemap': load_texture('../data/graphics/tilemap.png'),
+            'tilemap': runtime.load_texture_asset('../data/graphics/tilemap.png'),
             'player_animation_data': import_spritesheet_animation('../images/player/player_sheet'),
             'worm_animation': import_spritestrip_animation(40, '../images/enemies/worm/worm_spritesheet'),
             'bee_animation': import_spritestrip_animation(40, '../images/enemies/bee/bee_spritesheet'),
-            'bullet': load_texture('../images/gun/bullet.png'),
-            'fire': load_texture('../images/gun/fire.png'),
-            'flash_shader': load_shader(ffi.NULL, '../shaders/flash.glsl')
+            'bullet': runtime.load_texture_asset('../images/gun/bullet.png'),
+            'fire': runtime.load_texture_asset('../images/gun/fire.png'),
+            'flash_shader': None if headless else load_shader(ffi.NULL, '../shaders/flash.glsl')
         }
 
         # Shaders
         self.flash_shader = self.assets['flash_shader']
-        self.flash_loc = get_shader_location(self.flash_shader, 'flash')
+        if not headless:
+            self.flash_loc = get_shader_location(self.flash_shader, 'flash')
+            # Only flashing enemies are drawn with the shader, so the uniform is uploaded once
+            self.flash_value = ffi.new("float[2]", [1.0, 0.0])
+            set_shader_value(self.flash_shader, self.flash_loc, self.flash_value, SHADER_UNIFORM_VEC2)
 
-        # groups
-        self.all_sprites = []
-        self.bullet_sprites = []
-        self.enemy_sprites = []
-        self.tiles = []
-        self.collision_tiles = []
+        # groups, tiles are static and only drawn through the chunk renderer
+        # bullets are walked before the player that fires them, so a new bullet waits for the next tick
+        self.registry = Registry('bullet', 'sprite', 'worm', 'bee')
+        self.all_sprites = self.registry['sprite']
+        self.bullet_sprites = self.registry['bullet']
+        self.worms = self.registry['worm']
+        self.bees = self.registry['bee']
+        self.enemy_hash = SpatialHash()
+        self.flashing = []  # Reused every frame for the enemies drawn with the flash shader
+
+        # pools
+        self.bullet_pool = Pool(Bullet)
+        self.fire_pool = Pool(Fire)
+        self.bee_pool = Pool(Bee)
+
+        # Sparks thrown out where a bullet hits, falling like everything else in the level
+        self.particles = ParticleSystem()
+        self.hit_particles = self.particles.add(ParticleEmitter(MAX_PARTICLES, (80, 320), (0.3, 0.7), 4, (255, 140, 40, 255), gravity=900, drag=1))
 
         self.setup()
 
+        # Throttles spawning or recycles far bees when frames get too slow
+        self.spawn_director = SpawnDirector(MAX_BEES)
+
         # Timers
         self.bee_timer = Timer(0.5, func=self.create_bee, repeat=True, autostart=True)
 
@@ -40,113 +79,212 @@ class Game:
         self.camera = Camera2D()
         self.camera.zoom = 1
         self.camera.target = self.player.center
-        self.camera.offset = Vector2(get_screen_width() / 2, get_screen_height() / 2)
+        self.camera.offset = Vector2(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2)
         self.camera.rotation = 0
+        self.previous_camera_target = self.player.center
+
+        # Simulation runs at TICK_RATE no matter how fast frames are drawn
+        self.fixed_step = FixedStep()
 
     def setup(self):
-        tmx_data = TiledMap('../data/maps/world.tmx')
+        tmx_data = load_map('../data/maps/world.tmx')
         self.level_width = tmx_data.width * TILE_SIZE
         self.level_height = tmx_data.height * TILE_SIZE
+        self.collision_grid = TileGrid(tmx_data.width, tmx_data.height)
 
         for x, y, gid_or_tuple in tmx_data.get_layer_by_name('Decoration').tiles():
             filename, rect, flags = gid_or_tuple
             source_rect = Rectangle(*rect)
             dest_rect = Rectangle(x * TILE_SIZE, y * TILE_SIZE, source_rect.width, source_rect.height)
 
-            self.tiles.append(Tile(dest_rect, source_rect))
+            self.registry.add_static(Tile(dest_rect, source_rect))
 
         for x, y, gid_or_tuple in tmx_data.get_layer_by_name('Main').tiles():
             filename, rect, flags = gid_or_tuple
             source_rect = Rectangle(*rect)
             dest_rect = Rectangle(x * TILE_SIZE, y * TILE_SIZE, source_rect.width, source_rect.height)
 
-            self.collision_tiles.append(Tile(dest_rect, source_rect))
+            tile = Tile(dest_rect, source_rect)
+            self.registry.add_static(tile)
+            self.collision_grid.add(x, y, tile)
+
+        # Both tile layers are static, so they are drawn once into chunk textures
+        self.tile_renderer = ChunkRenderer(self.assets['tilemap'], self.level_width, self.level_height)
+        if not self.headless:
+            self.tile_renderer.bake(self.registry.static)
 
         for obj in tmx_data.get_layer_by_name('Entities'):
             if obj.name == 'Player':
-                self.player = Player(self.assets['player_animation_data'], Vector2(obj.x, obj.y), self.collision_tiles, self.create_bullet)
+                self.player = Player(self.assets['player_animation_data'], Vector2(obj.x, obj.y), self.collision_grid, self.create_bullet)
 
-                self.all_sprites.append(self.player)
+                self.registry.add('sprite', self.player)
             if obj.name == 'Worm':
                 worm = Worm(
                     self.assets['worm_animation'][0],
                     self.assets['worm_animation'][1],
-                    Rectangle(obj.x, obj.y, obj.width, obj.height),
-                    shader=self.flash_shader,
-                    flash_loc=self.flash_loc
+                    Rectangle(obj.x, obj.y, obj.width, obj.height)
                 )
-                self.enemy_sprites.append(worm)
+                self.registry.add('worm', worm)
 
     def collision(self):
         # Bullet -> Enenmies
+        self.enemy_hash.clear()
+        for enemy in self.registry.dynamic('worm', 'bee'):
+            self.enemy_hash.insert(enemy, enemy.dest)
+
         for bullet in self.bullet_sprites:
-            for enemy in self.enemy_sprites:
+            for enemy in self.enemy_hash.query(bullet.dest):
                 if check_collision_recs(bullet.dest, enemy.dest):
                     bullet.discard = True
                     enemy.destroy()
+                    self.hit_particles.emit(bullet.dest.x + bullet.dest.width / 2, bullet.dest.y + bullet.dest.height / 2, 16)
 
         # Enemies -> Player
-        for enemy in self.enemy_sprites:
+        for enemy in self.registry.dynamic('worm', 'bee'):
             if check_collision_recs(self.player.hitbox_rect, enemy.dest):
                 self.running = False
 
     def create_bee(self):
+        # Bees killed earlier this tick must not count towards the limit
+        remove_discarded(self.bees)
+        decision = self.spawn_director.decide(len(self.bees))
+        if decision == 'throttle':
+            return
+        if decision == 'recycle' and self.bees:
+            center = self.player.center
+            max(self.bees, key=lambda bee: (bee.dest.x - center.x) ** 2 + (bee.dest.y - center.y) ** 2).discard = True
+
         pos = Vector2(self.level_width + WINDOW_WIDTH, randint(0, self.level_height))
-        self.enemy_sprites.append(
-            Bee(self.assets['bee_animation'][0], self.assets['bee_animation'][1], pos, randint(300, 500), self.flash_shader, self.flash_loc))
+        bee = self.bee_pool.acquire(self.assets['bee_animation'][0], self.assets['bee_animation'][1], pos, randint(300, 500))
+        self.registry.add('bee', bee)
 
     def create_bullet(self, pos, direction):
         offset_y = self.assets['bullet'].height / 2 - 5
         x = pos.x + direction.x * 34 if direction.x == 1 else pos.x + direction.x * 34 - self.assets['bullet'].width
         y = pos.y - offset_y
-        self.bullet_sprites.append(Bullet(self.assets['bullet'], Vector2(x, y), direction))
-        self.all_sprites.append(Fire(self.assets['fire'], Vector2(x, y), self.player))
+        self.registry.add('bullet', self.bullet_pool.acquire(self.assets['bullet'], Vector2(x, y), direction))
+        self.registry.add('sprite', self.fire_pool.acquire(self.assets['fire'], Vector2(x, y), self.player))
 
     def discard_sprites(self):
-        self.bullet_sprites = [bullet for bullet in self.bullet_sprites if not bullet.discard]
-        self.all_sprites = [sprite for sprite in self.all_sprites if not sprite.discard]
-        self.enemy_sprites = [enemy for enemy in self.enemy_sprites if not enemy.discard]
+        remove_discarded(self.bullet_sprites)
+        remove_discarded(self.all_sprites)
+        remove_discarded(self.worms)
+        remove_discarded(self.bees)
 
-    def update(self):
-        delta_time = get_frame_time()
-        if is_key_pressed(KEY_F1):
+    def input(self):
+        # Polled once per rendered frame, a fixed update can run zero or several times per frame
+        if runtime.controls.is_key_pressed(KEY_F1):
             self.debug = not self.debug
 
-        self.bee_timer.update()
+    def update(self, delta_time):
+        # Fires every timer that is due, including the bee spawner
+        scheduler.update(delta_time)
 
-        for sprite in self.all_sprites + self.bullet_sprites + self.enemy_sprites:
+        store_positions(self.registry.dynamic())
+        self.previous_camera_target = self.player.center
+        for sprite in self.registry.dynamic():
             sprite.update(delta_time)
+        self.particles.update(delta_time)
 
         self.camera.target = self.player.center
         self.collision()
         self.discard_sprites()
 
-    def draw(self):
+    def draw(self, alpha):
+        self.camera.target = vector2_lerp(self.previous_camera_target, self.player.center, alpha)
+
         begin_drawing()
         begin_mode_2d(self.camera)
         clear_background(BG_COLOR)
-        for tile in self.tiles + self.collision_tiles:
-            draw_texture_pro(self.assets['tilemap'], tile.source, tile.dest, Vector2(), 0, WHITE)
+        view = get_camera_view(self.camera)
+        self.tile_renderer.draw(view)
 
-            # Draw collider
-            if tile in self.collision_tiles and self.debug:
+        # Draw colliders
+        if self.debug:
+            for tile in self.collision_grid.query(view):
                 draw_rectangle_lines_ex(tile.dest, 1, RED)
-        for sprite in self.all_sprites + self.bullet_sprites  + self.enemy_sprites:
-            sprite.draw(self.debug)
+
+        with interpolated(self.registry, alpha):
+            # Culling
+            cull_rect = get_camera_view(self.camera, CULL_MARGIN)
+            self.drawn_sprites, self.culled_sprites = 0, 0
+            for sprite in self.registry.dynamic('sprite', 'bullet'):
+                if check_collision_recs(sprite.dest, cull_rect):
+                    sprite.draw(self.debug)
+                    self.drawn_sprites += 1
+                else:
+                    self.culled_sprites += 1
+
+            # Enemies that are not flashing share the normal batch, flashing ones get a single shader pass
+            flashing = self.flashing
+            flashing.clear()
+            for enemy in self.registry.dynamic('worm', 'bee'):
+                if not check_collision_recs(enemy.dest, cull_rect):
+                    self.culled_sprites += 1
+                    continue
+                self.drawn_sprites += 1
+                if enemy.flashing:
+                    flashing.append(enemy)
+                else:
+                    enemy.draw(self.debug)
+
+            if flashing:
+                begin_shader_mode(self.flash_shader)
+                for enemy in flashing:
+                    enemy.draw(False)
+                end_shader_mode()
+
+                if self.debug:
+                    for enemy in flashing:
+                        draw_rectangle_lines_ex(enemy.dest, 1, RED)
+
+            self.particles.draw(alpha)
 
         end_mode_2d()
         draw_fps(0, 0)
+        if self.debug:
+            draw_text(f'Drawn: {self.drawn_sprites} Culled: {self.culled_sprites}', 0, 20, 20, BLACK)
+            pools = (self.bullet_pool, self.fire_pool, self.bee_pool)
+            allocated, reused = sum(pool.allocated for pool in pools), sum(pool.reused for pool in pools)
+            draw_text(f'Allocated: {allocated} Reused: {reused} Particles: {self.particles.count}', 0, 40, 20, BLACK)
+            draw_text(self.spawn_director.metrics, 0, 60, 20, BLACK)
+        self.spawn_director.end_frame()
         end_drawing()
 
     def run(self):
         set_target_fps(FRAMERATE)
         while self.running and not window_should_close():
-            self.update()
-            self.draw()
+            self.spawn_director.begin_frame()
+            self.input()
+            for _ in range(self.fixed_step.advance(runtime.clock.get_frame_time())):
+                self.update(self.fixed_step.delta_time)
+            self.draw(self.fixed_step.alpha)
 
+        self.tile_renderer.unload()
         unload_shader(self.assets['flash_shader'])
         close_window()
 
+    def simulate(self, frames: int) -> int:
+        """Run up to frames virtual frames without drawing and return how many ran. Headless only."""
+        for frame in range(frames):
+            if not self.running:
+                return frame
+            runtime.clock.tick()
+            runtime.controls.tick()
+            self.spawn_director.begin_frame()
+            self.input()
+            for _ in range(self.fixed_step.advance(runtime.clock.get_frame_time())):
+                self.update(self.fixed_step.delta_time)
+            self.spawn_director.end_frame()
+        return frames
+
 if __name__ == '__main__':
-    game = Game()
-    game.run() 
\ No newline at end of file
+    # python main.py --headless 10000
+    if len(sys.argv) == 3 and sys.argv[1] == '--headless':
+        game = Game(headless=True)
+        start = perf_counter()
+        frames = game.simulate(int(sys.argv[2]))
+        print(f'{frames} frames in {perf_counter() - start:.2f}s')
+    else:
+        game = Game()
+        game.run() 
\ No newline at end of file
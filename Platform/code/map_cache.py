@@ -0,0 +1,165 @@
+import json
+import mmap
+import os
+import re
+import sys
+from array import array
+from hashlib import sha1
+
+CACHE_MAGIC = b'TMXC'
+CACHE_VERSION = 1
+
+class MapObject:
+    def __init__(self, name, x, y, width, height, image):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.image = image    # (filename, source rect, flags) like pytmx, or None
+
+class TileLayer:
+    def __init__(self, name: str, width: int, tile_ids: memoryview, images: list):
+        self.name = name
+        self.width = width
+        self.tile_ids = tile_ids    # One id per cell, 0 is empty, n is images[n - 1]
+        self.images = images
+
+    def tiles(self):
+        """Yield (x, y, (filename, source rect, flags)) for every non-empty cell, like pytmx."""
+        images, width = self.images, self.width
+        for index, tile_id in enumerate(self.tile_ids):
+            if tile_id:
+                yield index % width, index // width, images[tile_id - 1]
+
+class CompiledMap:
+    """Read-only map loaded from the binary cache, answering the same queries the games ask pytmx."""
+    def __init__(self, header: dict, buffer, data_start: int):
+        self.buffer = buffer    # Keeps the memory map alive while layers point into it
+        self.width = header['width']
+        self.height = header['height']
+        self.tilewidth = header['tilewidth']
+        self.tileheight = header['tileheight']
+
+        images = [
+            (filename, tuple(rect) if rect else None, tuple(flags) if flags else None)
+            for filename, rect, flags in header['images']
+        ]
+        view = memoryview(buffer)
+        self.layers = {}
+        for name, offset, count in header['tile_layers']:
+            start = data_start + offset
+            tile_ids = view[start:start + count * 4].cast('I')
+            self.layers[name] = TileLayer(name, self.width, tile_ids, images)
+        for name, objects in header['object_layers'].items():
+            self.layers[name] = [
+                MapObject(obj_name, x, y, width, height, images[image_id - 1] if image_id else None)
+                for obj_name, x, y, width, height, image_id in objects
+            ]
+
+    def get_layer_by_name(self, name: str):
+        return self.layers[name]
+
+def source_key(path: str) -> str:
+    """Hash of the .tmx file and every .tsx tileset it references."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    digest = sha1(data)
+    folder = os.path.dirname(path)
+    for tileset in re.findall(rb'source="([^"]+\.tsx)"', data):
+        with open(os.path.join(folder, tileset.decode()), 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+def compile_map(path: str, key: str) -> bytes:
+    # pytmx is only needed when the cache is missing or out of date
+    from pytmx import TiledMap, TiledTileLayer, TiledObjectGroup
+    tmx_data = TiledMap(path)
+
+    images, image_ids = [], {}
+    def image_id(image) -> int:
+        filename, rect, flags = image
+        entry = (filename, tuple(rect) if rect else None, tuple(int(flag) for flag in flags) if flags else None)
+        if entry not in image_ids:
+            images.append(entry)
+            image_ids[entry] = len(images)
+        return image_ids[entry]
+
+    tile_arrays, object_layers = [], {}
+    for layer in tmx_data.layers:
+        if isinstance(layer, TiledTileLayer):
+            tile_ids = array('I', bytes(4 * tmx_data.width * tmx_data.height))
+            for x, y, image in layer.tiles():
+                tile_ids[y * tmx_data.width + x] = image_id(image)
+            tile_arrays.append((layer.name, tile_ids))
+        elif isinstance(layer, TiledObjectGroup):
+            object_layers[layer.name] = [
+                (obj.name, obj.x, obj.y, obj.width, obj.height, image_id(obj.image) if obj.image else 0)
+                for obj in layer
+            ]
+
+    header = {
+        'key': key,
+        'byteorder': sys.byteorder,
+        'width': tmx_data.width,
+        'height': tmx_data.height,
+        'tilewidth': tmx_data.tilewidth,
+        'tileheight': tmx_data.tileheight,
+        'images': images,
+        'object_layers': object_layers,
+        'tile_layers': [],    # (name, byte offset after the header, tile count)
+    }
+    offset = 0
+    for name, tile_ids in tile_arrays:
+        header['tile_layers'].append((name, offset, len(tile_ids)))
+        offset += len(tile_ids) * tile_ids.itemsize
+
+    # Layout: magic, version, header length, JSON header, padding to 4 bytes, raw uint32 tile ids
+    header_bytes = json.dumps(header).encode()
+    data = bytearray(CACHE_MAGIC + CACHE_VERSION.to_bytes(4, 'little') + len(header_bytes).to_bytes(4, 'little'))
+    data += header_bytes
+    data += bytes(-len(data) % 4)
+    for _, tile_ids in tile_arrays:
+        data += tile_ids.tobytes()
+    return bytes(data)
+
+def read_cache(buffer, key: str) -> CompiledMap | None:
+    if buffer[:4] != CACHE_MAGIC or int.from_bytes(buffer[4:8], 'little') != CACHE_VERSION:
+        return None
+    header_length = int.from_bytes(buffer[8:12], 'little')
+    header = json.loads(bytes(buffer[12:12 + header_length]))
+    if header['key'] != key or header['byteorder'] != sys.byteorder:
+        return None
+    data_start = (12 + header_length + 3) // 4 * 4
+    # A truncated file would otherwise load with layers cut short
+    if any(data_start + offset + count * 4 > len(buffer) for _, offset, count in header['tile_layers']):
+        return None
+    return CompiledMap(header, buffer, data_start)
+
+def load_map(path: str) -> CompiledMap:
+    """Load a Tiled map from its binary cache next to the .tmx file, compiling it first if it is stale."""
+    cache_path = path + '.cache'
+    key = source_key(path)
+
+    buffer = compiled_map = None
+    try:
+        with open(cache_path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        compiled_map = read_cache(buffer, key)
+        if compiled_map:
+            return compiled_map
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        pass    # Missing, empty, truncated or corrupt, it is compiled again below
+    finally:
+        # Only a map that loaded keeps its memory map open
+        if buffer is not None and not compiled_map:
+            buffer.close()
+
+    data = compile_map(path, key)
+    try:
+        with open(cache_path + '.tmp', 'wb') as file:
+            file.write(data)
+        os.replace(cache_path + '.tmp', cache_path)
+    except OSError:
+        pass    # A read-only install still works, it just parses the map every time
+    return read_cache(data, key)
@@ -0,0 +1,37 @@
+class Pool:
+    """Hands out recycled instances of cls. Pooled classes take the constructor arguments in reset()."""
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.allocated = 0  # Instances created
+        self.reused = 0     # Acquires served from the free list
+
+    def acquire(self, *args):
+        if self.free:
+            instance = self.free.pop()
+            instance.reset(*args)
+            self.reused += 1
+        else:
+            instance = self.cls(*args)
+            instance.pool = self
+            self.allocated += 1
+
+        # Otherwise a recycled sprite would be interpolated from where it was discarded
+        instance.previous_position = (instance.dest.x, instance.dest.y)
+        return instance
+
+    def release(self, instance):
+        self.free.append(instance)
+
+def remove_discarded(sprites: list):
+    """Drop discarded sprites from the list in place and give pooled ones back to their pool."""
+    kept = 0
+    for sprite in sprites:
+        if sprite.discard:
+            pool = getattr(sprite, 'pool', None)
+            if pool:
+                pool.release(sprite)
+        else:
+            sprites[kept] = sprite
+            kept += 1
+    del sprites[kept:]
@@ -0,0 +1,96 @@
+from settings import *
+
+class Clock:
+    """Wall clock read from raylib."""
+    def get_time(self) -> float:
+        return get_time()
+
+    def get_frame_time(self) -> float:
+        return get_frame_time()
+
+    def tick(self):
+        pass
+
+class VirtualClock(Clock):
+    """Clock that only moves when ticked, by the same amount every frame."""
+    def __init__(self, frame_time: float = 1 / TICK_RATE):
+        self.time = 0.0
+        self.frame_time = frame_time
+
+    def get_time(self) -> float:
+        return self.time
+
+    def get_frame_time(self) -> float:
+        return self.frame_time
+
+    def tick(self):
+        self.time += self.frame_time
+
+class Input:
+    """Keyboard and mouse read from raylib."""
+    def is_key_down(self, key: int) -> bool:
+        return is_key_down(key)
+
+    def is_key_pressed(self, key: int) -> bool:
+        return is_key_pressed(key)
+
+    def is_mouse_button_down(self, button: int) -> bool:
+        return is_mouse_button_down(button)
+
+    def get_mouse_position(self) -> Vector2:
+        return get_mouse_position()
+
+    def tick(self):
+        pass
+
+class ScriptedInput(Input):
+    """Replays {frame: held keys} scripts. Keys stay held until the next entry of their script."""
+    def __init__(self, keys: dict[int, set[int]] | None = None, mouse_buttons: dict[int, set[int]] | None = None,
+                 mouse_position: Vector2 = None):
+        self.keys = keys or {}
+        self.mouse_buttons = mouse_buttons or {}
+        self.mouse_position = mouse_position or Vector2(WINDOW_WIDTH, WINDOW_HEIGHT / 2)
+
+        self.frame = -1
+        self.keys_down = set()
+        self.previous_keys_down = set()
+        self.mouse_buttons_down = set()
+
+    def is_key_down(self, key: int) -> bool:
+        return key in self.keys_down
+
+    def is_key_pressed(self, key: int) -> bool:
+        return key in self.keys_down and key not in self.previous_keys_down
+
+    def is_mouse_button_down(self, button: int) -> bool:
+        return button in self.mouse_buttons_down
+
+    def get_mouse_position(self) -> Vector2:
+        return self.mouse_position
+
+    def tick(self):
+        self.frame += 1
+        self.previous_keys_down = self.keys_down
+        self.keys_down = self.keys.get(self.frame, self.keys_down)
+        self.mouse_buttons_down = self.mouse_buttons.get(self.frame, self.mouse_buttons_down)
+
+# Everything that reads time or input goes through these, so headless runs can swap them out
+headless = False
+clock = Clock()
+controls = Input()
+
+def start_headless(scripted_input: ScriptedInput | None = None, virtual_clock: VirtualClock | None = None):
+    global headless, clock, controls
+    headless = True
+    clock = virtual_clock or VirtualClock()
+    controls = scripted_input or ScriptedInput()
+
+def load_texture_asset(path: str) -> Texture:
+    if not headless:
+        return load_texture(path)
+
+    # Without a window there is no GPU to upload to, but sprites still need the size
+    image = load_image(path)
+    texture = Texture(0, image.width, image.height, 1, image.format)
+    unload_image(image)
+    return texture
@@ -6,5 +6,15 @@ from utilities import hex_to_color
 
 WINDOW_WIDTH, WINDOW_HEIGHT = 1280,720
 TILE_SIZE = 64 
-FRAMERATE = 60
+CHUNK_SIZE = 16    # In tiles
+CULL_MARGIN = 64   # Sprites this close to the screen edge are still drawn
+SPATIAL_CELL_SIZE = 128
+FRAMERATE = 60     # Rendering cap
+TICK_RATE = 60     # Simulation updates per second
+MAX_STEPS = 5      # Most simulation updates per rendered frame
+MAX_PARTICLES = 10000  # Most live particles per emitter
+MAX_BEES = 40      # Most live bees the spawn director allows
+FRAME_BUDGET = 1 / 60  # Seconds of work per frame the spawn director holds to
+FRAME_WINDOW = 60   # Frames in the rolling frame time average
+BUDGET_HEADROOM = 0.8  # Below this share of the budget the bee limit grows back
 BG_COLOR = hex_to_color('#fcdfcd')
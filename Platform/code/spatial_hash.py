@@ -0,0 +1,42 @@
+from settings import *
+
+class SpatialHash:
+    def __init__(self, cell_size: int = SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], list] = {}
+
+    def clear(self):
+        self.cells.clear()
+
+    def cell_range(self, rect: Rectangle) -> tuple[int, int, int, int]:
+        return (
+            int(rect.x // self.cell_size),
+            int(rect.y // self.cell_size),
+            int((rect.x + rect.width) // self.cell_size),
+            int((rect.y + rect.height) // self.cell_size)
+        )
+
+    def insert(self, item, rect: Rectangle):
+        left, top, right, bottom = self.cell_range(rect)
+        for y in range(top, bottom + 1):
+            for x in range(left, right + 1):
+                cell = self.cells.get((x, y))
+                if cell is None:
+                    self.cells[(x, y)] = [item]
+                else:
+                    cell.append(item)
+
+    def query(self, rect: Rectangle) -> list:
+        """Return every item sharing a cell with rect, each one once. Callers still do the exact test."""
+        left, top, right, bottom = self.cell_range(rect)
+        if left == right and top == bottom:
+            return self.cells.get((left, top), [])
+
+        found = {}
+        for y in range(top, bottom + 1):
+            for x in range(left, right + 1):
+                cell = self.cells.get((x, y))
+                if cell:
+                    for item in cell:
+                        found[id(item)] = item
+        return list(found.values())
@@ -0,0 +1,52 @@
+from collections import deque
+from time import perf_counter
+from settings import *
+
+class SpawnDirector:
+    """Decides what a spawner does each time it fires, so the frame time stays inside FRAME_BUDGET.
+
+    'spawn' adds an enemy, 'throttle' skips this spawn and 'recycle' replaces the farthest enemy instead
+    of adding one. The enemy limit shrinks while frames are over budget and grows back while there is headroom.
+    """
+    def __init__(self, max_enemies: int, frame_budget: float = FRAME_BUDGET, window: int = FRAME_WINDOW):
+        self.max_enemies = max_enemies
+        self.enemy_limit = max_enemies
+        self.frame_budget = frame_budget
+        self.frame_times = deque(maxlen=window)
+        self.frame_start = None
+
+        # Counted decisions, shown in the debug overlay for tuning
+        self.decisions = {'spawn': 0, 'throttle': 0, 'recycle': 0}
+
+    def begin_frame(self):
+        self.frame_start = perf_counter()
+
+    def end_frame(self):
+        # Called before end_drawing, so waiting for the frame cap or vsync doesn't count as work
+        if self.frame_start is not None:
+            self.frame_times.append(perf_counter() - self.frame_start)
+            self.frame_start = None
+
+    @property
+    def average_frame_time(self) -> float:
+        return sum(self.frame_times) / len(self.frame_times) if self.frame_times else 0.0
+
+    def decide(self, enemy_count: int) -> str:
+        average = self.average_frame_time
+        if average > self.frame_budget:
+            self.enemy_limit = max(min(self.enemy_limit, enemy_count), 1)
+            decision = 'throttle'
+        elif enemy_count >= self.enemy_limit:
+            if average < self.frame_budget * BUDGET_HEADROOM:
+                self.enemy_limit = min(self.enemy_limit + 1, self.max_enemies)
+            decision = 'recycle'
+        else:
+            decision = 'spawn'
+        self.decisions[decision] += 1
+        return decision
+
+    @property
+    def metrics(self) -> str:
+        return (f'Frame: {self.average_frame_time * 1000:.1f}/{self.frame_budget * 1000:.1f} ms '
+                f'Limit: {self.enemy_limit} Spawned: {self.decisions["spawn"]} '
+                f'Throttled: {self.decisions["throttle"]} Recycled: {self.decisions["recycle"]}')
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from math import sin
-from timer import Timer
+import runtime
+from timer import Timer, scheduler
 from settings import *
 
 @dataclass
@@ -38,20 +39,36 @@ class Sprite:
 class Bullet(Sprite):
     def __init__(self, tex: Texture, pos: Vector2, direction):
         super().__init__(tex, pos)
+        self.speed = 850
+        # Long gone off-screen by then, discarding lets the bullet be reused
+        self.lifetime_timer = Timer(2, func=self.kill)
+        self.reset(tex, pos, direction)
+
+    def reset(self, tex: Texture, pos: Vector2, direction):
+        self.dest.x, self.dest.y = pos.x, pos.y
+        self.direction = direction
+        self.discard = False
+        self.lifetime_timer.activate()
 
         # adjustment
-        self.source.width *= -1 if direction.x == -1 else 1
+        self.source.width = tex.width * (-1 if direction.x == -1 else 1)
 
-        self.speed = 850
-        self.direction = direction
+    def kill(self):
+        self.discard = True
 
 class Fire(Sprite):
     def __init__(self, tex: Texture, pos: Vector2, player: Player):
         super().__init__(tex, pos)
+        self.timer = Timer(0.1, func=self.kill)
+        self.y_offset = 5
+        self.reset(tex, pos, player)
+
+    def reset(self, tex: Texture, pos: Vector2, player: Player):
         self.player = player
         self.facing_right = self.player.facing_right
-        self.timer = Timer(0.1, autostart=True, func=self.kill)
-        self.y_offset = 5
+        self.source.width = tex.width
+        self.discard = False
+        self.timer.activate()
 
         if self.player.facing_right:
             self.dest.x = (self.player.dest.x + self.player.dest.width)
@@ -65,7 +82,6 @@ class Fire(Sprite):
         self.discard = True
 
     def update(self, delta_time):
-        self.timer.update()
         super().update(delta_time)
 
         # Follow player
@@ -81,7 +97,7 @@ class Fire(Sprite):
             self.kill()
 
 class AnimatedSprite(Sprite):
-    def __init__(self, tex: Texture, animation_rects: dict[str, list[Rectangle]] | list[Rectangle], pos: Vector2):
+    def __init__(self, tex: Texture, animation_rects: dict[str, tuple[Rectangle, ...]] | tuple[Rectangle, ...], pos: Vector2):
         super().__init__(tex, pos)
         self.animation_rects = animation_rects
         self.animation_speed: int = 10
@@ -91,7 +107,7 @@ class AnimatedSprite(Sprite):
         if isinstance(self.animation_rects, dict):
             self.state = list(self.animation_rects.keys())[0]
             self.source = self.animation_rects[self.state][self.frame_index]
-        elif isinstance(self.animation_rects, list):
+        elif isinstance(self.animation_rects, tuple):
             self.source = self.animation_rects[self.frame_index]
         self.dest = Rectangle(pos.x, pos.y, self.source.width, self.source.height)
 
@@ -102,7 +118,7 @@ class AnimatedSprite(Sprite):
         self.frame_index = self.frame_index + self.animation_speed * delta_time
         if isinstance(self.animation_rects, dict):
             self.source = self.animation_rects[self.state][int(self.frame_index) % len(self.animation_rects[self.state])]
-        elif isinstance(self.animation_rects, list):
+        elif isinstance(self.animation_rects, tuple):
             self.source = self.animation_rects[int(self.frame_index) % len(self.animation_rects)]
 
     def update(self, delta_time):
@@ -111,7 +127,7 @@ class AnimatedSprite(Sprite):
         self.animate(delta_time)
 
 class Player(AnimatedSprite):
-    def __init__(self, animation_data: tuple[Texture, dict[str, list[Rectangle]]], pos: Vector2, collision_tiles, create_bullet):
+    def __init__(self, animation_data: tuple[Texture, dict[str, tuple[Rectangle, ...]]], pos: Vector2, collision_grid, create_bullet):
         super().__init__(animation_data[0], animation_data[1], pos)
         self.create_bullet = create_bullet
 
@@ -126,12 +142,13 @@ class Player(AnimatedSprite):
         )
 
         # Collision
-        self.collision_tiles = collision_tiles
+        self.collision_grid = collision_grid
         self.floor_rect = Rectangle(self.hitbox_rect.x, self.hitbox_rect.y + self.hitbox_rect.height,
                                     self.hitbox_rect.width, 2)
 
-        # Jumping
-        self.gravity = 50
+        # Jumping, in pixels per second
+        self.gravity = 3000
+        self.jump_speed = 1200
         self.on_floor = False
 
         # Timer
@@ -156,7 +173,7 @@ class Player(AnimatedSprite):
             self.state = 'run'
 
     def collision(self, axis: str):
-        for sprite in self.collision_tiles:
+        for sprite in self.collision_grid.query(self.hitbox_rect):
             if check_collision_recs(self.hitbox_rect, sprite.dest):
                 if axis == 'x':
                     if self.direction.x > 0:
@@ -172,11 +189,11 @@ class Player(AnimatedSprite):
                         self.direction.y = 0
 
     def input(self):
-        self.direction.x = is_key_down(KEY_RIGHT) - is_key_down(KEY_LEFT)
-        if is_key_down(KEY_UP) and self.on_floor:
-            self.direction.y = -20
+        self.direction.x = runtime.controls.is_key_down(KEY_RIGHT) - runtime.controls.is_key_down(KEY_LEFT)
+        if runtime.controls.is_key_down(KEY_UP) and self.on_floor:
+            self.direction.y = -self.jump_speed
 
-        if is_key_down(KEY_S) and not self.shoot_timer:
+        if runtime.controls.is_key_down(KEY_S) and not self.shoot_timer:
             self.create_bullet(self.center, Vector2(1 if self.facing_right else -1, 0))
             self.shoot_timer.activate()
 
@@ -187,7 +204,7 @@ class Player(AnimatedSprite):
 
         # Vertical
         self.direction.y += self.gravity * delta_time
-        self.hitbox_rect.y += self.direction.y
+        self.hitbox_rect.y += self.direction.y * delta_time
         self.collision('y')
 
         self.dest.x = self.hitbox_rect.x - self.hitbox_shrink.x / 2 + self.hitbox_visual_offset.x
@@ -195,14 +212,9 @@ class Player(AnimatedSprite):
 
     def check_floor(self):
         self.floor_rect = Rectangle(self.hitbox_rect.x, self.hitbox_rect.y + self.hitbox_rect.height, self.hitbox_rect.width, 2)
-        self.on_floor = False
-        for sprite in self.collision_tiles:
-            if check_collision_recs(self.floor_rect, sprite.dest):
-                self.on_floor = True
+        self.on_floor = self.collision_grid.collides(self.floor_rect)
 
     def update(self, delta_time):
-        self.shoot_timer.update()
-
         self.input()
         super().update(delta_time)
         self.check_floor()
@@ -228,11 +240,13 @@ class Player(AnimatedSprite):
             draw_rectangle_lines_ex(self.hitbox_rect, 1, ORANGE)
 
 class Enemy(AnimatedSprite):
-    def __init__(self, tex, animation_rects, pos, shader, flash_loc):
+    def __init__(self, tex, animation_rects, pos):
         super().__init__(tex, animation_rects, pos)
         self.death_timer = Timer(0.2, func=self.kill)
-        self.shader = shader
-        self.flash_loc = flash_loc
+
+    @property
+    def flashing(self) -> bool:
+        return self.death_timer.active
 
     def kill(self):
         self.discard = True
@@ -245,48 +259,46 @@ class Enemy(AnimatedSprite):
         if self.death_timer: return
         super().move(delta_time)
 
-    def update(self, delta_time):
-        self.death_timer.update()
-        super().update(delta_time)
-
     def draw(self, debug: bool):
         source = Rectangle(self.source.x, self.source.y, self.source.width, self.source.height)
         if hasattr(self, "facing_right") and not self.facing_right:
             source.width *= -1
 
-        flash_strength = 0.0
-        if self.death_timer.active:
-            flash_strength = 1.0
-
-        flash_val = ffi.new("float[2]", [flash_strength, 0.0])
-        set_shader_value(self.shader, self.flash_loc, flash_val, SHADER_UNIFORM_VEC2)
-
-        begin_shader_mode(self.shader)
+        # The flash shader is applied by Game.draw for all flashing enemies at once
         draw_texture_pro(self.tex, source, self.dest, Vector2(), 0, WHITE)
-        end_shader_mode()
 
         if debug:
             draw_rectangle_lines_ex(self.dest, 1, RED)
 
 class Bee(Enemy):
-    def __init__(self, tex: Texture, animation_rects: dict[str, list[Rectangle]] | list[Rectangle], pos: Vector2, speed, shader, flash_loc):
-        super().__init__(tex, animation_rects, pos, shader, flash_loc)
+    def __init__(self, tex: Texture, animation_rects: dict[str, tuple[Rectangle, ...]] | tuple[Rectangle, ...], pos: Vector2, speed):
+        super().__init__(tex, animation_rects, pos)
+        self.reset(tex, animation_rects, pos, speed)
+
+    def reset(self, tex: Texture, animation_rects: dict[str, tuple[Rectangle, ...]] | tuple[Rectangle, ...], pos: Vector2, speed):
+        self.dest.x, self.dest.y = pos.x, pos.y
         self.speed = speed
         self.amplitude = randint(500, 600)
         self.frequency = randint(2, 4)
 
+        self.frame_index = 0
+        self.animation_speed = 10
+        self.discard = False
+        self.death_timer.deactivate()
+
     def move(self, delta_time):
         if self.death_timer: return
         self.dest.x -= self.speed * delta_time
-        self.dest.y += sin(get_time() * self.frequency) * self.amplitude * delta_time
+        # Simulation time, so the bob follows the ticks and not how fast frames are drawn
+        self.dest.y += sin(scheduler.time * self.frequency) * self.amplitude * delta_time
 
     def check_discard(self):
         if self.dest.x <= 0:
             self.discard = True
 
 class Worm(Enemy):
-    def __init__(self, tex: Texture, animation_rects: dict[str, list[Rectangle]] | list[Rectangle], rect: Rectangle, shader, flash_loc):
-        super().__init__(tex, animation_rects, Vector2(rect.x, rect.y), shader, flash_loc)
+    def __init__(self, tex: Texture, animation_rects: dict[str, tuple[Rectangle, ...]] | tuple[Rectangle, ...], rect: Rectangle):
+        super().__init__(tex, animation_rects, Vector2(rect.x, rect.y))
         self.dest.y = rect.y + rect.height - self.dest.height
         self.moveable_area = rect
         self.speed = randint(160, 200)
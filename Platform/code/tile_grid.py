@@ -0,0 +1,40 @@
+from settings import *
+
+class TileGrid:
+    def __init__(self, width: int, height: int, tile_size: int = TILE_SIZE):
+        self.width = width      # In tiles
+        self.height = height    # In tiles
+        self.tile_size = tile_size
+        self.cells = [None] * (width * height)
+
+    def add(self, x: int, y: int, tile):
+        self.cells[y * self.width + x] = tile
+
+    def cell_range(self, rect: Rectangle) -> tuple[int, int, int, int]:
+        left = max(int(rect.x // self.tile_size), 0)
+        top = max(int(rect.y // self.tile_size), 0)
+        right = min(int((rect.x + rect.width) // self.tile_size), self.width - 1)
+        bottom = min(int((rect.y + rect.height) // self.tile_size), self.height - 1)
+        return left, top, right, bottom
+
+    def query(self, rect: Rectangle) -> list:
+        """Return the tiles overlapping rect, looking only at the cells it touches."""
+        left, top, right, bottom = self.cell_range(rect)
+        tiles = []
+        for y in range(top, bottom + 1):
+            row = y * self.width
+            for x in range(left, right + 1):
+                tile = self.cells[row + x]
+                if tile and check_collision_recs(rect, tile.dest):
+                    tiles.append(tile)
+        return tiles
+
+    def collides(self, rect: Rectangle) -> bool:
+        left, top, right, bottom = self.cell_range(rect)
+        for y in range(top, bottom + 1):
+            row = y * self.width
+            for x in range(left, right + 1):
+                tile = self.cells[row + x]
+                if tile and check_collision_recs(rect, tile.dest):
+                    return True
+        return False
@@ -16,4 +16,13 @@ def hex_to_color(hex_str):
     else:
         raise ValueError(f"Invalid hex color: {hex_str}")
 
-    return Color(r, g, b, a)
\ No newline at end of file
+    return Color(r, g, b, a)
+
+def get_camera_view(camera: Camera2D, margin: float = 0) -> Rectangle:
+    """World-space rectangle visible through an unrotated Camera2D, grown by margin on every side."""
+    return Rectangle(
+        camera.target.x - camera.offset.x / camera.zoom - margin,
+        camera.target.y - camera.offset.y / camera.zoom - margin,
+        get_screen_width() / camera.zoom + margin * 2,
+        get_screen_height() / camera.zoom + margin * 2
+    )
\ No newline at end of file
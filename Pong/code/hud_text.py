@@ -0,0 +1,60 @@
+from collections import deque
+import runtime
+from settings import *
+
+class CachedText:
+    """A label rendered into a texture when its value changes and drawn from that texture every other frame.
+
+    Renders happen in update, call it before begin_drawing so texture mode never interrupts a camera.
+    """
+    def __init__(self, font: Font, font_size: float, spacing: float = 0, color=WHITE):
+        self.font = font
+        self.font_size = font_size
+        self.spacing = spacing
+        self.color = color
+
+        self.value = None
+        self.target = None
+        self.width = self.height = 0
+        self.source = Rectangle()
+        self.position = Vector2()
+        self.render_times = deque()  # Clock times of the renders in the last second
+
+    def update(self, value):
+        if value == self.value:
+            return
+        self.value = value
+        text = str(value)
+        size = measure_text_ex(self.font, text, self.font_size, self.spacing)
+        width, height = int(size.x) + 1, int(size.y) + 1
+
+        # A new texture only when the size changes, which for a score is when it gains a digit or so
+        if self.target is None or (width, height) != (self.width, self.height):
+            if self.target is not None:
+                unload_render_texture(self.target)
+            self.target = load_render_texture(width, height)
+            self.width, self.height = width, height
+            # Render textures are stored upside down, so the source height is negative
+            self.source = Rectangle(0, 0, width, -height)
+
+        begin_texture_mode(self.target)
+        clear_background(BLANK)
+        draw_text_ex(self.font, text, Vector2(), self.font_size, self.spacing, self.color)
+        end_texture_mode()
+        self.render_times.append(runtime.clock.get_time())
+
+    @property
+    def renders_per_second(self) -> int:
+        now = runtime.clock.get_time()
+        while self.render_times and self.render_times[0] <= now - 1:
+            self.render_times.popleft()
+        return len(self.render_times)
+
+    def draw(self, x: float, y: float):
+        self.position.x, self.position.y = x, y
+        draw_texture_rec(self.target.texture, self.source, self.position, WHITE)
+
+    def unload(self):
+        if self.target is not None:
+            unload_render_texture(self.target)
+            self.target = None
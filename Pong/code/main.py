@@ -1,8 +1,16 @@
 import os
+import sys
 from random import choice
+from time import perf_counter
 import json
+import runtime
+from runtime import ScriptedInput
 from settings import *
 from sprites import Ball, Player, Opoonent
+from fixed_step import FixedStep, store_positions, interpolated
+from particles import ParticleSystem, ParticleEmitter
+from hud_text import CachedText
+from registry import Registry
 
 def get_score_path():
     # Build absolute path to Pong/data/score.txt
@@ -14,18 +22,27 @@ def get_score_path():
     return score_path
 
 class Main:
-    def __init__(self):
-        init_window(WINDOW_WIDTH, WINDOW_HEIGHT, 'Pong')
-
-        self.paddles = []
+    def __init__(self, headless: bool = False, controls: ScriptedInput | None = None):
+        # Headless games have no window, use a virtual clock and scripted input and are never drawn
+        self.headless = headless
+        if headless:
+            runtime.start_headless(controls)
+        else:
+            init_window(WINDOW_WIDTH, WINDOW_HEIGHT, 'Pong')
+        self.debug = False
+
+        self.registry = Registry('paddle', 'ball')
+        self.paddles = self.registry['paddle']
+        self.particles = ParticleSystem()
+        self.hit_particles = self.particles.add(ParticleEmitter(MAX_PARTICLES, (100, 350), (0.2, 0.5), 6, COLORS['ball'], drag=3))
 
         ball_direction = Vector2(choice([1, -1]), uniform(0.7, 0.8) * choice([-1, 1]))
-        self.ball = Ball(Vector2(get_screen_width() / 2, get_screen_height() / 2), SIZE['ball'][0], ball_direction, self.paddles, self.update_score)
+        self.ball = self.registry.add('ball', Ball(Vector2(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2), SIZE['ball'][0], ball_direction, self.paddles, self.update_score, self.hit_paddle))
 
         self.player = Player(Vector2(*POS['player']), Vector2(*SIZE['paddle']))
         self.opoonent = Opoonent(Vector2(*POS['opponent']), Vector2(*SIZE['paddle']), self.ball)
-        self.paddles.append(self.player)
-        self.paddles.append(self.opoonent)
+        self.registry.add('paddle', self.player)
+        self.registry.add('paddle', self.opoonent)
 
         # score
         try:
@@ -34,19 +51,24 @@ class Main:
         except:
             self.score = {'player': 0, 'opponent': 0}
 
-    def display_score(self):
+        # Scores only change on a goal, so each is rendered then and drawn from its texture in between.
+        # Spacing is a tenth of the size, like draw_text with the default font
         font_size = 160
+        self.score_text = None if headless else {
+            side: CachedText(get_font_default(), font_size, font_size / 10) for side in ('player', 'opponent')
+        }
+
+        # Simulation runs at TICK_RATE no matter how fast frames are drawn
+        self.fixed_step = FixedStep()
 
+    def display_score(self):
         # player
-        text = str(self.score['player'])
-        text_size = measure_text_ex(get_font_default(), text, font_size, 0)
-        draw_text(text, int(WINDOW_WIDTH / 2 + 100 - text_size.x / 2), int(WINDOW_HEIGHT / 2 - text_size.y / 2), 160, WHITE)
+        text = self.score_text['player']
+        text.draw(int(WINDOW_WIDTH / 2 + 100 - text.width / 2), int(WINDOW_HEIGHT / 2 - text.height / 2))
 
         # opponent
-        text = str(self.score['opponent'])
-        text_size = measure_text_ex(get_font_default(), text, font_size, 0)
-        draw_text(text, int(WINDOW_WIDTH / 2 - 100 - text_size.x / 2), int(WINDOW_HEIGHT / 2 - text_size.y / 2), 160,
-                  WHITE)
+        text = self.score_text['opponent']
+        text.draw(int(WINDOW_WIDTH / 2 - 100 - text.width / 2), int(WINDOW_HEIGHT / 2 - text.height / 2))
 
         # line separator
         draw_line_ex(Vector2(WINDOW_WIDTH / 2, 0), Vector2(WINDOW_WIDTH / 2, WINDOW_HEIGHT), 6, WHITE)
@@ -54,31 +76,67 @@ class Main:
     def update_score(self, side):
         self.score['player' if side == 'player' else 'opponent'] += 1
 
-    def update(self):
-        delta_time = get_frame_time()
+    def input(self):
+        # Polled once per rendered frame, a fixed update can run zero or several times per frame
+        if runtime.controls.is_key_pressed(KEY_F1):
+            self.debug = not self.debug
+
+    def hit_paddle(self, x, y):
+        self.hit_particles.emit(x, y, 20)
 
-        for sprite in self.paddles + [self.ball]:
+    def update(self, delta_time):
+        store_positions(self.registry.dynamic())
+        for sprite in self.registry.dynamic():
             sprite.update(delta_time)
+        self.particles.update(delta_time)
 
-    def draw(self):
+    def draw(self, alpha):
+        for side, text in self.score_text.items():
+            text.update(self.score[side])
         begin_drawing()
         clear_background(COLORS['bg'])
         self.display_score()
 
-        for sprite in self.paddles + [self.ball]:
-            sprite.draw()
+        with interpolated(self.registry, alpha):
+            for sprite in self.registry.dynamic():
+                sprite.draw()
+        self.particles.draw(alpha)
+        if self.debug:
+            renders = sum(text.renders_per_second for text in self.score_text.values())
+            draw_text(f'Score renders/s: {renders}', 0, 0, 20, WHITE)
         end_drawing()
 
     def run(self):
         while not window_should_close():
-            self.update()
-            self.draw()
+            self.input()
+            for _ in range(self.fixed_step.advance(runtime.clock.get_frame_time())):
+                self.update(self.fixed_step.delta_time)
+            self.draw(self.fixed_step.alpha)
 
         with open(get_score_path(), 'w') as score_file:
             json.dump(self.score, score_file)
 
+        for text in self.score_text.values():
+            text.unload()
         close_window()
 
+    def simulate(self, frames: int) -> int:
+        """Run frames virtual frames without drawing and return how many ran. Headless only."""
+        for _ in range(frames):
+            runtime.clock.tick()
+            runtime.controls.tick()
+            self.input()
+            for _ in range(self.fixed_step.advance(runtime.clock.get_frame_time())):
+                self.update(self.fixed_step.delta_time)
+        return frames
+
 
 if __name__ == '__main__':
-    Main().run()
\ No newline at end of file
+    # python main.py --headless 10000
+    if len(sys.argv) == 3 and sys.argv[1] == '--headless':
+        main = Main(headless=True)
+        start = perf_counter()
+        frames = main.simulate(int(sys.argv[2]))
+        print(f'{frames} frames in {perf_counter() - start:.2f}s')
+    else:
+        Main().run()
\ No newline at end of file
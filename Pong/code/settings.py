@@ -15,3 +15,6 @@ COLORS = {
     'ball shadow': hex_to_color('#c14f24'),
     'bg': hex_to_color('#002633'),
 }
+TICK_RATE = 60     # Simulation updates per second
+MAX_STEPS = 5      # Most simulation updates per rendered frame
+MAX_PARTICLES = 10000  # Most live particles per emitter
@@ -1,5 +1,6 @@
 from random import choice
 
+import runtime
 from settings import *
 
 
@@ -15,11 +16,11 @@ class Paddle:
     def constraint(self):
         if self.dest.y <= 0:
             self.dest.y = 0
-        elif self.dest.y + self.dest.height >= get_screen_height():
-            self.dest.y = get_screen_height() - self.dest.height
+        elif self.dest.y + self.dest.height >= WINDOW_HEIGHT:
+            self.dest.y = WINDOW_HEIGHT - self.dest.height
 
     def get_direction(self):
-        self.direction.y = is_key_down(KEY_DOWN) - is_key_down(KEY_UP)
+        self.direction.y = runtime.controls.is_key_down(KEY_DOWN) - runtime.controls.is_key_down(KEY_UP)
 
     def move(self, delta_time):
         self.dest.x += self.direction.x * self.speed * delta_time
@@ -57,10 +58,11 @@ class Opoonent(Paddle):
         self.direction = vector2_normalize(self.direction)
 
 class Ball:
-    def __init__(self, pos: Vector2, radius, direction, paddles, update_score):
+    def __init__(self, pos: Vector2, radius, direction, paddles, update_score, hit_paddle):
         self.paddles = paddles
         self.speed = SPEED['ball']
         self.update_score = update_score
+        self.hit_paddle = hit_paddle
 
         center_pos = Vector2(pos.x - radius / 2, pos.y - radius / 2)
         self.dest = Rectangle(center_pos.x, center_pos.y, radius, radius)
@@ -69,11 +71,12 @@ class Ball:
         self.radius = radius
 
         # timer
-        self.start_time = get_time()
+        self.start_time = runtime.clock.get_time()
         self.duration = 1
         self.speed_modifier = 1
 
     def collision(self, axis: str):
+        direction = (self.direction.x, self.direction.y)
         for sprite in self.paddles:
             if check_collision_recs(self.dest, sprite.dest):
                 if axis == 'x':
@@ -115,12 +118,15 @@ class Ball:
                         self.dest.y = sprite_bottom   # Ball top to sprite bottom
                         self.direction.y *= - 1
 
+        if (self.direction.x, self.direction.y) != direction:
+            self.hit_paddle(self.dest.x + self.radius / 2, self.dest.y + self.radius / 2)
+
     def constraint(self):
         if self.dest.y <= 0:
             self.dest.y = 0
             self.direction.y *= -1
-        elif self.dest.y + self.radius >= get_screen_height():
-            self.dest.y = get_screen_height() - self.radius
+        elif self.dest.y + self.radius >= WINDOW_HEIGHT:
+            self.dest.y = WINDOW_HEIGHT - self.radius
             self.direction.y *= -1
 
         elif self.dest.x + self.radius >= WINDOW_WIDTH or self.dest.x <= 0:
@@ -131,11 +137,12 @@ class Ball:
         self.dest.x = WINDOW_WIDTH / 2 - self.dest.width / 2
         self.dest.y = WINDOW_HEIGHT / 2 - self.dest.height / 2
         self.direction = Vector2(choice([1, -1]), uniform(0.7, 0.8) * choice([-1, 1]))
+        self.previous_position = (self.dest.x, self.dest.y)    # Don't interpolate across the jump to the center
 
-        self.start_time = get_time()
+        self.start_time = runtime.clock.get_time()
 
     def timer(self):
-        if get_time() - self.start_time >= self.duration:
+        if runtime.clock.get_time() - self.start_time >= self.duration:
             self.speed_modifier = 1
         else:
             self.speed_modifier = 0
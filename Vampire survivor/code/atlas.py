@@ -0,0 +1,112 @@
+import json
+import os
+from hashlib import sha1
+import runtime
+from settings import *
+
+class AtlasRegion:
+    """One packed image: the atlas page it ended up on and its rectangle there."""
+    def __init__(self, texture: Texture, source: Rectangle):
+        self.texture = texture
+        self.source = source
+        self.width = source.width
+        self.height = source.height
+
+def pack(sizes: list, page_size: int, padding: int) -> list:
+    """Shelf pack (width, height) sizes, tallest first, and return (page, x, y) for each one."""
+    placements = [None] * len(sizes)
+    page = x = y = shelf_height = 0
+    for index in sorted(range(len(sizes)), key=lambda index: -sizes[index][1]):
+        width, height = sizes[index]
+        if width > page_size or height > page_size:
+            raise ValueError(f'{width}x{height} image does not fit on a {page_size}px atlas page')
+        if x + width > page_size:
+            x, y, shelf_height = 0, y + shelf_height + padding, 0
+        if y + height > page_size:
+            page, x, y, shelf_height = page + 1, 0, 0, 0
+        placements[index] = (page, x, y)
+        x += width + padding
+        shelf_height = max(shelf_height, height)
+    return placements
+
+class Atlas:
+    """Images packed into as few textures as possible, so sprites drawn one after another stay in one batch.
+
+    The pages and their index are cached next to base and rebuilt when any source image changes.
+    """
+    def __init__(self, paths: list, base: str, page_size: int = ATLAS_SIZE, padding: int = ATLAS_PADDING):
+        paths = sorted({os.path.normpath(path) for path in paths})
+        index_path = base + '.atlas.json'
+        key = self.source_key(paths, page_size, padding)
+
+        try:
+            with open(index_path) as file:
+                index = json.load(file)
+            if index['key'] != key or not all(os.path.exists(page) for page in index['pages']):
+                index = None
+        except (OSError, ValueError, KeyError):
+            index = None
+        if index is None:
+            index, page_images = self.build(paths, base, key, page_size, padding)
+            try:
+                if not all(export_image(image, page) for image, page in zip(page_images, index['pages'])):
+                    raise OSError('atlas pages could not be written')
+                with open(index_path, 'w') as file:
+                    json.dump(index, file)
+            except OSError:
+                pass    # A read-only install still works, it just packs the atlas every time
+
+            # The pages just packed are still in memory, so the textures come from there and not the files
+            self.textures = [runtime.load_image_texture(image) for image in page_images]
+            for image in page_images:
+                unload_image(image)
+        else:
+            self.textures = [runtime.load_texture_asset(page) for page in index['pages']]
+        self.regions = {
+            path: AtlasRegion(self.textures[page], Rectangle(x, y, width, height))
+            for path, (page, x, y, width, height) in index['regions'].items()
+        }
+
+    @staticmethod
+    def source_key(paths: list, page_size: int, padding: int) -> str:
+        digest = sha1(f'{page_size} {padding}'.encode())
+        for path in paths:
+            digest.update(path.encode())
+            with open(path, 'rb') as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    @staticmethod
+    def build(paths: list, base: str, key: str, page_size: int, padding: int) -> tuple[dict, list]:
+        # Image functions run on the CPU, so this works without a window too
+        images = [load_image(path) for path in paths]
+        placements = pack([(image.width, image.height) for image in images], page_size, padding)
+
+        page_count = max(page for page, _, _ in placements) + 1 if placements else 0
+        page_heights = [0] * page_count
+        for image, (page, x, y) in zip(images, placements):
+            page_heights[page] = max(page_heights[page], y + image.height)
+
+        pages, page_images = [], []
+        for page, height in enumerate(page_heights):
+            atlas_image = gen_image_color(page_size, height, BLANK)
+            for image, (image_page, x, y) in zip(images, placements):
+                if image_page == page:
+                    image_draw(atlas_image, image, Rectangle(0, 0, image.width, image.height), Rectangle(x, y, image.width, image.height), WHITE)
+            pages.append(f'{base}.atlas.{page}.png')
+            page_images.append(atlas_image)
+
+        regions = {
+            path: (page, x, y, image.width, image.height)
+            for path, image, (page, x, y) in zip(paths, images, placements)
+        }
+        for image in images:
+            unload_image(image)
+        return {'key': key, 'pages': pages, 'regions': regions}, page_images
+
+    def region(self, path: str) -> AtlasRegion:
+        return self.regions[os.path.normpath(path)]
+
+    def unload(self):
+        for texture in self.textures:
+            unload_texture(texture)
@@ -0,0 +1,55 @@
+import sys
+from random import choice, seed
+from time import perf_counter
+
+import main
+from timer import scheduler
+
+# python bench_swarm.py [ticks] [enemy counts...]
+# Headless ticks with a fixed number of enemies crowding the player, as swarm enemies and as Enemy objects.
+# Spawning is stopped so the count stays put, the first WARMUP_TICKS let the crowd reach the player.
+# The separation step is then timed on its own, as often as there are ticks, on the crowd as it stands.
+
+WARMUP_TICKS = 120
+
+def time_separation(game, ticks: int) -> float:
+    start = perf_counter()
+    for _ in range(ticks):
+        if game.swarm is not None:
+            swarm, n = game.swarm, game.swarm.count
+            game.swarm.separation(swarm.x[:n] + swarm.width[:n] / 2, swarm.y[:n] + swarm.height[:n] / 2)
+        else:
+            # Enemy objects need the enemy hash rebuilt every tick, which is part of what separation costs them
+            game.enemy_hash.clear()
+            for enemy in game.enemies:
+                game.enemy_hash.insert(enemy, enemy.hitbox_rect)
+            for enemy in game.enemies:
+                enemy.separation()
+    return (perf_counter() - start) / ticks * 1000
+
+def bench(use_swarm: bool, enemy_count: int, ticks: int) -> tuple[float, float]:
+    seed(0)
+    scheduler.queue.clear()     # The scheduler outlives a game, drop the timers of the last one
+    main.USE_ENEMY_SWARM = use_swarm
+    game = main.Main(headless=True)
+    game.spawn_timer.func = None
+    for _ in range(enemy_count):
+        image, pos = choice(game.enemy_images), choice(game.spawn_positions)
+        if game.swarm is not None:
+            game.swarm.spawn(image, pos)
+        else:
+            game.enemies.append(game.enemy_pool.acquire(image, pos, game.collision_hash, game.player, game.flow_field, game.enemy_hash))
+
+    game.simulate(WARMUP_TICKS)
+    start = perf_counter()
+    game.simulate(ticks)
+    return (perf_counter() - start) / ticks * 1000, time_separation(game, ticks)
+
+if __name__ == '__main__':
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    counts = [int(count) for count in sys.argv[2:]] or [250, 500, 1000, 2000]
+    print(f'{"enemies":>8} {"swarm ms/tick":>14} {"separation":>11} {"objects ms/tick":>16} {"separation":>11}')
+    for enemy_count in counts:
+        swarm_tick, swarm_separation = bench(True, enemy_count, ticks)
+        objects_tick, objects_separation = bench(False, enemy_count, ticks)
+        print(f'{enemy_count:8} {swarm_tick:14.1f} {swarm_separation:11.1f} {objects_tick:16.1f} {objects_separation:11.1f}')
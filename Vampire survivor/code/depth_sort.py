@@ -0,0 +1,48 @@
+from settings import *
+from spatial_hash import SpatialHash
+
+def depth(sprite) -> float:
+    return sprite.dest.y + sprite.dest.height / 2
+
+class DepthSorter:
+    """Keeps sprites in drawing order. Static sprites are sorted once, dynamic ones start from last frame's order."""
+    def __init__(self, static_sprites: list, static_hash: SpatialHash):
+        self.static_hash = static_hash
+        # id -> (rank, depth), the rank is the position in the presorted static order
+        self.static_order = {id(sprite): (rank, depth(sprite)) for rank, sprite in enumerate(sorted(static_sprites, key=depth))}
+        self.dynamic = []   # Dynamic sprites in last frame's depth order, kept from frame to frame
+        self.frame = 0
+
+    def visible_static(self, view: Rectangle) -> list:
+        """Return (depth, sprite) for the static sprites inside view, in depth order."""
+        sprites = [sprite for sprite in self.static_hash.query(view) if check_collision_recs(sprite.dest, view)]
+        sprites.sort(key=lambda sprite: self.static_order[id(sprite)][0])
+        return [(self.static_order[id(sprite)][1], sprite) for sprite in sprites]
+
+    def sort_dynamic(self, sprites) -> list:
+        """Return sprites in depth order. sprites is walked twice, so it has to be a list or a Registry.
+
+        The returned list belongs to the sorter and is reused next frame.
+        """
+        # Sprites keep their place from the last frame and new ones go at the end. Sprites only move a
+        # little per frame, so the list is nearly sorted and Timsort only has to fix the few that moved.
+        # Membership is stamped on the sprites, so no set or dict is built per frame.
+        self.frame += 1
+        for sprite in sprites:
+            sprite.sort_frame = self.frame
+
+        dynamic, kept = self.dynamic, 0
+        for sprite in dynamic:
+            if sprite.sort_frame == self.frame:
+                dynamic[kept] = sprite
+                kept += 1
+            else:
+                sprite.depth_sorted = False
+        del dynamic[kept:]
+
+        for sprite in sprites:
+            if not getattr(sprite, 'depth_sorted', False):
+                sprite.depth_sorted = True
+                dynamic.append(sprite)
+        dynamic.sort(key=depth)
+        return dynamic
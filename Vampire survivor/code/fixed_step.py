@@ -0,0 +1,46 @@
+from contextlib import contextmanager
+from settings import *
+
+class FixedStep:
+    def __init__(self, tick_rate: int = TICK_RATE, max_steps: int = MAX_STEPS):
+        self.delta_time = 1 / tick_rate
+        self.max_steps = max_steps    # Per rendered frame, so a slow frame can't snowball
+        self.accumulator = 0.0
+
+    def advance(self, frame_time: float) -> int:
+        """Add the time of the last rendered frame and return how many fixed updates are due."""
+        self.accumulator += frame_time
+        steps = int(self.accumulator / self.delta_time)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.accumulator = steps * self.delta_time
+        self.accumulator -= steps * self.delta_time
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        # How far the renderer is between the last two updates, from 0 to 1
+        return self.accumulator / self.delta_time
+
+def store_positions(sprites):
+    for sprite in sprites:
+        sprite.previous_position = (sprite.dest.x, sprite.dest.y)
+
+@contextmanager
+def interpolated(sprites, alpha: float):
+    """Move sprites between their previous and current position while drawing, then put them back.
+
+    sprites is walked twice, so it has to be a list or a Registry, not a one-off iterator.
+    """
+    for sprite in sprites:
+        x, y = sprite.dest.x, sprite.dest.y
+        previous_x, previous_y = getattr(sprite, 'previous_position', (x, y))
+        # Kept on the sprite rather than in a list, so drawing allocates nothing per sprite
+        sprite.current_x, sprite.current_y = x, y
+        sprite.dest.x = previous_x + (x - previous_x) * alpha
+        sprite.dest.y = previous_y + (y - previous_y) * alpha
+    try:
+        yield
+    finally:
+        for sprite in sprites:
+            sprite.dest.x, sprite.dest.y = sprite.current_x, sprite.current_y
@@ -0,0 +1,93 @@
+from array import array
+from collections import deque
+from math import sqrt
+from settings import *
+
+class FlowField:
+    """For every open tile, the direction of the shortest tile path to the target. Shared by all enemies."""
+    NEIGHBOURS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+    def __init__(self, width: int, height: int, colliders: list, tile_size: int = TILE_SIZE):
+        self.width = width      # In tiles
+        self.height = height    # In tiles
+        self.tile_size = tile_size
+
+        # A tile is blocked when any collider overlaps it
+        self.blocked = bytearray(width * height)
+        for collider in colliders:
+            rect = collider.dest
+            left, top = max(int(rect.x // tile_size), 0), max(int(rect.y // tile_size), 0)
+            right = min(int((rect.x + rect.width - 1) // tile_size), width - 1)
+            bottom = min(int((rect.y + rect.height - 1) // tile_size), height - 1)
+            for y in range(top, bottom + 1):
+                for x in range(left, right + 1):
+                    self.blocked[y * width + x] = 1
+
+        # Unit directions, (0, 0) where there is no path. Arrays so the swarm can read them without copying
+        self.direction_x = array('f', bytes(4 * width * height))
+        self.direction_y = array('f', bytes(4 * width * height))
+        self.distance = [-1] * (width * height)
+        self.target_cell = None
+
+    def cell(self, x: float, y: float) -> int | None:
+        column, row = int(x // self.tile_size), int(y // self.tile_size)
+        if 0 <= column < self.width and 0 <= row < self.height:
+            return row * self.width + column
+        return None
+
+    def update(self, target: Vector2):
+        """Rebuild the field, but only when the target has moved to another tile."""
+        target_cell = self.cell(target.x, target.y)
+        if target_cell == self.target_cell:
+            return
+        self.target_cell = target_cell
+        if target_cell is None:
+            self.direction_x[:] = self.direction_y[:] = array('f', bytes(4 * self.width * self.height))
+            return
+        self.build(target_cell)
+
+    def build(self, target_cell: int):
+        width, height, blocked = self.width, self.height, self.blocked
+        distance = self.distance = [-1] * (width * height)
+
+        # Breadth first search out from the target, diagonal steps only where both sides are open
+        distance[target_cell] = 0
+        queue = deque([target_cell])
+        while queue:
+            cell = queue.popleft()
+            x, y = cell % width, cell // width
+            for dx, dy in self.NEIGHBOURS:
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                neighbour = ny * width + nx
+                if blocked[neighbour] or distance[neighbour] != -1:
+                    continue
+                if dx and dy and (blocked[y * width + nx] or blocked[ny * width + x]):
+                    continue
+                distance[neighbour] = distance[cell] + 1
+                queue.append(neighbour)
+
+        # Each tile points at its closest neighbour, the target tile itself has no direction
+        diagonal = 1 / sqrt(2)
+        direction_x, direction_y = self.direction_x, self.direction_y
+        for cell in range(width * height):
+            direction_x[cell] = direction_y[cell] = 0
+            if distance[cell] <= 0:
+                continue
+            x, y = cell % width, cell // width
+            for dx, dy in self.NEIGHBOURS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height and distance[ny * width + nx] == distance[cell] - 1:
+                    if dx and dy and (blocked[y * width + nx] or blocked[ny * width + x]):
+                        continue
+                    scale = diagonal if dx and dy else 1
+                    direction_x[cell], direction_y[cell] = dx * scale, dy * scale
+                    break
+
+    def direction(self, x: float, y: float) -> tuple[float, float] | None:
+        """Direction to follow from the world position (x, y), or None where the field has none."""
+        cell = self.cell(x, y)
+        if cell is None or (self.direction_x[cell] == 0 and self.direction_y[cell] == 0):
+            return None
+        return self.direction_x[cell], self.direction_y[cell]
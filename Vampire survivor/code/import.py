@@ -1,4 +0,0 @@
-from settings import *
-
-def import_animation_sheet(*path):
-    pass
\ No newline at end of file
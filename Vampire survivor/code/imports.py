@@ -0,0 +1,27 @@
+import json
+from settings import *
+
+# Frame tables are tuples shared by all sprites using them, never change them
+frame_tables = {}
+
+def load_frame_tables(json_path: str) -> dict[str, tuple[Rectangle, ...]]:
+    """Frame rects for each animation tag of an Aseprite sheet, parsed on the first call for json_path."""
+    if json_path not in frame_tables:
+        with open(json_path) as file:
+            data = json.load(file)
+
+        # Aseprite exports frames either as an array or as a name -> frame hash
+        all_frames = data['frames'] if isinstance(data['frames'], list) else list(data['frames'].values())
+        tables = {}
+        for tag in data['meta']['frameTags']:
+            frames = [all_frames[i]['frame'] for i in range(tag['from'], tag['to'] + 1)]
+            tables[tag['name']] = tuple(Rectangle(frame['x'], frame['y'], frame['w'], frame['h']) for frame in frames)
+        frame_tables[json_path] = tables
+    return frame_tables[json_path]
+
+def strip_frames(frame_width: float, frame_height: float, count: int, x: float = 0, y: float = 0) -> tuple[Rectangle, ...]:
+    """Rects of count frames laid side by side from (x, y)."""
+    key = (x, y, frame_width, frame_height, count)
+    if key not in frame_tables:
+        frame_tables[key] = tuple(Rectangle(x + i * frame_width, y, frame_width, frame_height) for i in range(count))
+    return frame_tables[key]
@@ -1,83 +1,143 @@
+import sys
+from heapq import merge
+from operator import itemgetter
 from random import choice
+from time import perf_counter
 
+import runtime
+from runtime import ScriptedInput
 from settings import *
+from timer import Timer, scheduler
 from sprites import Player, Collider, Sprite, Tile, Gun, Bullet, Enemy
-from pytmx import TiledMap
+from utilities import get_camera_view, segment_enter_box
+from pool import Pool, remove_discarded
+from spatial_hash import SpatialHash
+from swarm import EnemySwarm, swarm_available
+from depth_sort import DepthSorter, depth
+from chunk_renderer import ChunkRenderer
+from atlas import Atlas
+from spawn_director import SpawnDirector
+from flow_field import FlowField
+from particles import ParticleSystem, ParticleEmitter
+from registry import Registry
+from fixed_step import FixedStep, store_positions, interpolated
+from map_cache import load_map
 from pyray import *
 
 class Main:
-    def __init__(self):
-        init_window(WINDOW_WIDTH, WINDOW_HEIGHT, 'Vampire Survivor')
+    def __init__(self, headless: bool = False, controls: ScriptedInput | None = None):
+        # Headless games have no window, use a virtual clock and scripted input and are never drawn
+        self.headless = headless
+        if headless:
+            runtime.start_headless(controls)
+        else:
+            init_window(WINDOW_WIDTH, WINDOW_HEIGHT, 'Vampire Survivor')
 
         self.assets = {
-            'player': load_texture('../images/player/character_sheet.png'),
-            'world_tileset': load_texture('../data/graphics/tilesets/world_tileset.png'),
-            'gun': load_texture('../images/gun/gun.png'),
-            'bullet': load_texture('../images/gun/bullet.png'),
-            'skeleton': load_texture('../images/enemies/skeleton/skeleton.png'),
-            'bat': load_texture('../images/enemies/bat/bat.png'),
-            'blob': load_texture('../images/enemies/blob/blob.png'),
+            'player': runtime.load_texture_asset('../images/player/character_sheet.png'),
+            'world_tileset': runtime.load_texture_asset('../data/graphics/tilesets/world_tileset.png'),
         }
         self.debug: bool = False
+        self.drawn_sprites = 0
+        self.culled_sprites = 0
+
+        # Colliders and map objects are static, everything else is updated every tick
+        self.registry = Registry('player', 'gun', 'bullet', 'enemy')
+        self.collision_sprites = self.registry.static
+        self.collision_hash = SpatialHash()
+        self.enemy_hash = SpatialHash()    # Rebuilt every tick from the enemy hitboxes
+        self.bullets = self.registry['bullet']
+        self.enemies = self.registry['enemy']
+        self.bullet_pool = Pool(Bullet)
+        self.enemy_pool = Pool(Enemy)
+        self.particles = ParticleSystem()
+        self.hit_particles = self.particles.add(ParticleEmitter(MAX_PARTICLES, (60, 260), (0.2, 0.6), 5, (170, 20, 30, 255), drag=4))
 
-        self.collision_sprites = []
-        self.bullets = []
-        self.ground_tiles = []
-        self.enemies = []
-
-        # enemy spawn timer
         self.spawn_positions = []
         self.enemy_spawn_rate = 0.5
-        self.enemy_spawn_time = 0
+        self.gun_cooldown = 0.1
 
         self.setup()
 
-        # gun timer
-        self.can_shoot = True
-        self.shoot_time = 0
-        self.gun_cooldown = 0.1
+        # Enemies live either in the NumPy swarm or as Enemy objects in self.enemies
+        self.enemy_images = [self.assets['skeleton'], self.assets['blob'], self.assets['bat']]
+        self.swarm = EnemySwarm(self.enemy_images, self.collision_sprites, self.flow_field) if USE_ENEMY_SWARM and swarm_available else None
+
+        # Throttles spawning or recycles far enemies when frames get too slow
+        self.spawn_director = SpawnDirector(MAX_ENEMIES)
+
+        # Timers
+        self.spawn_timer = Timer(self.enemy_spawn_rate, repeat=True, autostart=True, func=self.spawn_enemy)
+        self.gun_timer = Timer(self.gun_cooldown)
 
         # camera
         self.camera = Camera2D()
         self.camera.zoom = 1
         self.camera.target = Vector2(self.player.dest.x + self.player.source.width / 2, self.player.dest.y + self.player.source.height / 2)
-        self.camera.offset = Vector2(get_screen_width() / 2, get_screen_height() / 2)
+        self.camera.offset = Vector2(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2)
         self.camera.rotation = 0
+        self.previous_camera_target = Vector2(self.camera.target.x, self.camera.target.y)
 
-    def setup(self):
-        tmx_data = TiledMap('../data/maps/world.tmx')
+        # Simulation runs at TICK_RATE no matter how fast frames are drawn
+        self.fixed_step = FixedStep()
 
-        object_texture_cache = {}
+    def setup(self):
+        tmx_data = load_map('../data/maps/world.tmx')
+
+        # Everything drawn in the y-sorted pass shares atlas pages, so it goes out in one batch
+        sprite_images = {
+            'gun': '../images/gun/gun.png',
+            'bullet': '../images/gun/bullet.png',
+            'skeleton': '../images/enemies/skeleton/skeleton.png',
+            'bat': '../images/enemies/bat/bat.png',
+            'blob': '../images/enemies/blob/blob.png',
+        }
+        object_images = [obj.image[0] for obj in tmx_data.get_layer_by_name('Objects')]
+        self.atlas = Atlas(list(sprite_images.values()) + object_images, '../images/sprites')
+        for name, path in sprite_images.items():
+            self.assets[name] = self.atlas.region(path)
 
         for obj in tmx_data.get_layer_by_name('Objects'):
-            filename = obj.image[0]
-            if filename not in object_texture_cache:
-                object_texture_cache[filename] = load_texture(str(filename))
-            texture = object_texture_cache[filename]
-            self.collision_sprites.append(Sprite(texture, Vector2(obj.x, obj.y)))
+            image = self.atlas.region(obj.image[0])
+            self.registry.add_static(Sprite(image.texture, Vector2(obj.x, obj.y), image.source))
 
         for obj in tmx_data.get_layer_by_name('Collisions'):
-            self.collision_sprites.append(Collider(Vector2(obj.x, obj.y), Vector2(obj.width, obj.height)))
-
-        for x, y, gid_or_tuple in tmx_data.get_layer_by_name('Ground').tiles():
-            filename, rect, flags = gid_or_tuple
-            source_rect = Rectangle(*rect)
-            position = Vector2(x * TILE_SIZE, y * TILE_SIZE)
-
-            self.ground_tiles.append(Tile(position, source_rect))
+            self.registry.add_static(Collider(Vector2(obj.x, obj.y), Vector2(obj.width, obj.height)))
+        # Colliders are invisible, so the debug overlay leaves them out of the drawn and culled counts
+        self.drawable_static = sum(not isinstance(sprite, Collider) for sprite in self.registry.static)
+
+        # Colliders never move, so the index is built once and shared by everything that collides
+        for sprite in self.collision_sprites:
+            self.collision_hash.insert(sprite, sprite.dest)
+        self.depth_sorter = DepthSorter(self.collision_sprites, self.collision_hash)
+        self.flow_field = FlowField(tmx_data.width, tmx_data.height, self.collision_sprites)
+
+        # The ground never changes, so it is drawn once into chunk textures and the tiles are not kept
+        self.ground_renderer = ChunkRenderer(self.assets['world_tileset'], tmx_data.width * TILE_SIZE, tmx_data.height * TILE_SIZE)
+        if not self.headless:
+            ground_tiles = []
+            for x, y, gid_or_tuple in tmx_data.get_layer_by_name('Ground').tiles():
+                filename, rect, flags = gid_or_tuple
+                source_rect = Rectangle(*rect)
+                position = Vector2(x * TILE_SIZE, y * TILE_SIZE)
+
+                ground_tiles.append(Tile(position, source_rect))
+            self.ground_renderer.bake(ground_tiles)
 
         for obj in tmx_data.get_layer_by_name('Entities'):
             if obj.name == 'Player':
-                self.player = Player(self.assets['player'], Vector2(obj.x - 64, obj.y), self.collision_sprites)
-                self.gun = Gun(self.assets['gun'], self.player)
+                self.player = self.registry.add('player', Player(self.assets['player'], Vector2(obj.x - 64, obj.y), self.collision_hash))
+                self.gun = self.registry.add('gun', Gun(self.assets['gun'], self.player))
             else:
                 self.spawn_positions.append(Vector2(obj.x, obj.y))
 
     def input(self):
-        if is_key_pressed(KEY_F1):
+        # Polled once per rendered frame, a fixed update can run zero or several times per frame
+        if runtime.controls.is_key_pressed(KEY_F1):
             self.debug = not self.debug
 
-        if is_mouse_button_down(0) and self.can_shoot:
+    def shoot(self):
+        if runtime.controls.is_mouse_button_down(0) and not self.gun_timer:
             offset = 10
             if self.gun.player_direction.x > 0:
                 offset *= -1
@@ -88,71 +148,174 @@ class Main:
                 self.gun.dest.y + self.gun.player_direction.y * 65 + bullet_y_offset.y
             )
 
-            self.bullets.append(Bullet(self.assets['bullet'], pos, self.gun.player_direction))
-
-            self.can_shoot = False
-            self.shoot_time = get_time()
-
-    def gun_timer(self):
-        if not self.can_shoot:
-            current_time = get_time()
-            if current_time - self.shoot_time >= self.gun_cooldown:
-                self.can_shoot = True
-
-    def spawn_timer(self):
-        if get_time() - self.enemy_spawn_time >= self.enemy_spawn_rate:
-            tex = choice([self.assets['skeleton'], self.assets['blob'], self.assets['bat']])
-            pos = choice(self.spawn_positions)
-            self.enemies.append(Enemy(tex, pos, self.collision_sprites, self.player))
-
-            self.enemy_spawn_time = get_time()
+            self.registry.add('bullet', self.bullet_pool.acquire(self.assets['bullet'], pos, self.gun.player_direction))
+            self.gun_timer.activate()
+
+    def remove_farthest_enemy(self):
+        center = self.player.get_center()
+        if self.swarm is not None:
+            self.swarm.kill_farthest(center)
+        else:
+            if self.enemies:
+                farthest = max(self.enemies, key=lambda enemy: vector2_distance_sqr(enemy.get_center(), center))
+                farthest.discard = True
+
+    def remove_dead_enemies(self):
+        remove_discarded(self.enemies)
+        if self.swarm is not None:
+            self.swarm.remove_dead()
+
+    def spawn_enemy(self):
+        # Enemies killed or recycled earlier this tick must not count towards the limit
+        self.remove_dead_enemies()
+        enemy_count = len(self.swarm) if self.swarm is not None else len(self.enemies)
+        decision = self.spawn_director.decide(enemy_count)
+        if decision == 'throttle':
+            return
+        if decision == 'recycle':
+            self.remove_farthest_enemy()
+
+        image = choice(self.enemy_images)
+        pos = choice(self.spawn_positions)
+        if self.swarm is not None:
+            self.swarm.spawn(image, pos)
+        else:
+            self.registry.add('enemy', self.enemy_pool.acquire(image, pos, self.collision_hash, self.player, self.flow_field, self.enemy_hash))
 
     def bullet_collision(self):
+        # Each bullet is tested along the whole path it moved last tick, so it can't skip past an enemy
+        # A bullet is used up by its first hit, the enemy it reaches first, and enemies already hit this tick can't be hit again
         for bullet in self.bullets:
-            for enemy in self.enemies:
-                if check_collision_recs(bullet.get_collision_rect(), enemy.hitbox_rect):
-                    bullet.discard, enemy.discard = True, True
+            if bullet.discard:
+                continue
+            x0, y0 = bullet.previous_position
+            x1, y1 = bullet.dest.x, bullet.dest.y
+            half_width, half_height = bullet.origin.x, bullet.origin.y
+
+            if self.swarm is not None and self.swarm.kill_swept(x0, y0, x1, y1, half_width, half_height):
+                bullet.discard = True
+                self.hit_particles.emit(x1, y1, 16)
+                continue
+
+            left, top = min(x0, x1) - half_width, min(y0, y1) - half_height
+            width, height = abs(x1 - x0) + half_width * 2, abs(y1 - y0) + half_height * 2
+            first, first_enter = None, 1.0
+            for enemy in self.enemy_hash.query_area(left, top, width, height):
+                if enemy.discard:
+                    continue
+                hitbox = enemy.hitbox_rect
+                enter = segment_enter_box(x0, y0, x1, y1, hitbox.x - half_width, hitbox.y - half_height,
+                                          hitbox.x + hitbox.width + half_width, hitbox.y + hitbox.height + half_height)
+                if enter is not None and (first is None or enter < first_enter):
+                    first, first_enter = enemy, enter
+            if first is not None:
+                bullet.discard, first.discard = True, True
+                self.hit_particles.emit(x1, y1, 16)
 
     def discard_sprites(self):
-        self.bullets = [bullet for bullet in self.bullets if not bullet.discard]
-        self.enemies = [enemy for enemy in self.enemies if not enemy.discard]
+        remove_discarded(self.bullets)
+        self.remove_dead_enemies()
 
-    def update(self):
-        delta_time = get_frame_time()
+    def update(self, delta_time):
         self.discard_sprites()
-        self.gun_timer()
-        self.spawn_timer()
+        # Fires every timer that is due: enemy spawns, gun cooldown and bullet lifetimes
+        scheduler.update(delta_time)
+        self.enemy_hash.clear()
+        for enemy in self.enemies:
+            self.enemy_hash.insert(enemy, enemy.hitbox_rect)
         self.bullet_collision()
-        self.input()
-
-        for sprite in self.collision_sprites + [self.player, self.gun] + self.bullets + self.enemies:
+        self.shoot()
+
+        store_positions(self.registry.dynamic())
+        if self.swarm is not None:
+            self.swarm.store_positions()
+        self.previous_camera_target = Vector2(self.camera.target.x, self.camera.target.y)
+        self.flow_field.update(self.player.get_center())
+        for sprite in self.registry.dynamic():
             sprite.update(delta_time)
+        if self.swarm is not None:
+            self.swarm.update(delta_time, self.player.get_center())
+        self.particles.update(delta_time)
         self.camera.target = Vector2(self.player.dest.x + self.player.source.width / 2, self.player.dest.y + self.player.source.height / 2)
 
-    def draw(self):
+    def draw(self, alpha):
         def y_sorting():
-            sprites = self.collision_sprites + [self.player, self.gun] + self.bullets + self.enemies
-            for sprite in sorted(sprites, key=lambda sprite: sprite.dest.y + sprite.dest.height / 2):
-                sprite.draw(self.debug)
+            # Culling
+            cull_rect = get_camera_view(self.camera, CULL_MARGIN)
+            static_visible = self.depth_sorter.visible_static(cull_rect)
+            dynamic_visible = ((depth(sprite), sprite) for sprite in self.depth_sorter.sort_dynamic(self.registry)
+                               if check_collision_recs(sprite.dest, cull_rect))
+            swarm_visible = self.swarm.visible(cull_rect, alpha) if self.swarm is not None else []
+
+            # All three give (depth, item) already in depth order, swarm items are indices into the swarm
+            self.drawn_sprites = 0
+            for _, item in merge(static_visible, dynamic_visible, swarm_visible, key=itemgetter(0)):
+                if isinstance(item, int):
+                    self.swarm.draw(item, self.debug)
+                elif isinstance(item, Collider):
+                    item.draw(self.debug)
+                    continue
+                else:
+                    item.draw(self.debug)
+                self.drawn_sprites += 1
+            dynamic_count = len(self.registry) - len(self.registry.static)
+            total = self.drawable_static + dynamic_count + (len(self.swarm) if self.swarm is not None else 0)
+            self.culled_sprites = total - self.drawn_sprites
+
+        current_target = Vector2(self.camera.target.x, self.camera.target.y)
+        self.camera.target = vector2_lerp(self.previous_camera_target, current_target, alpha)
 
         begin_drawing()
         begin_mode_2d(self.camera)
         clear_background(GRAY)
 
-        for tile in self.ground_tiles:
-            draw_texture_rec(self.assets['world_tileset'], tile.source_rect, tile.position, WHITE)
-        y_sorting()
-
+        self.ground_renderer.draw(get_camera_view(self.camera))
+        with interpolated(self.registry, alpha):
+            y_sorting()
+        self.particles.draw(alpha)
 
         end_mode_2d()
         draw_fps(0, 0)
+        if self.debug:
+            draw_text(f'Drawn: {self.drawn_sprites} Culled: {self.culled_sprites}', 0, 20, 20, WHITE)
+            pools = (self.bullet_pool, self.enemy_pool)
+            allocated, reused = sum(pool.allocated for pool in pools), sum(pool.reused for pool in pools)
+            draw_text(f'Allocated: {allocated} Reused: {reused} Particles: {self.particles.count}', 0, 40, 20, WHITE)
+            draw_text(self.spawn_director.metrics, 0, 60, 20, WHITE)
+        self.spawn_director.end_frame()
         end_drawing()
+        self.camera.target = current_target
 
     def run(self):
         while not window_should_close():
-            self.update()
-            self.draw()
+            self.spawn_director.begin_frame()
+            self.input()
+            for _ in range(self.fixed_step.advance(runtime.clock.get_frame_time())):
+                self.update(self.fixed_step.delta_time)
+            self.draw(self.fixed_step.alpha)
+
+        self.ground_renderer.unload()
+        self.atlas.unload()
         close_window()
 
+    def simulate(self, frames: int) -> int:
+        """Run frames virtual frames without drawing and return how many ran. Headless only."""
+        for _ in range(frames):
+            runtime.clock.tick()
+            runtime.controls.tick()
+            self.spawn_director.begin_frame()
+            self.input()
+            for _ in range(self.fixed_step.advance(runtime.clock.get_frame_time())):
+                self.update(self.fixed_step.delta_time)
+            self.spawn_director.end_frame()
+        return frames
+
 if __name__ == '__main__':
-    Main().run()
+    # python main.py --headless 10000
+    if len(sys.argv) == 3 and sys.argv[1] == '--headless':
+        main = Main(headless=True)
+        start = perf_counter()
+        frames = main.simulate(int(sys.argv[2]))
+        print(f'{frames} frames in {perf_counter() - start:.2f}s')
+    else:
+        Main().run()
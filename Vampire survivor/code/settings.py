@@ -4,4 +4,20 @@ from random import randint, uniform
 from os.path import join
 
 WINDOW_WIDTH, WINDOW_HEIGHT = 1280, 720
-TILE_SIZE = 64
\ No newline at end of file
+TILE_SIZE = 64
+CULL_MARGIN = 64   # Sprites this close to the screen edge are still drawn
+CHUNK_SIZE = 16    # In tiles
+ATLAS_SIZE = 2048  # Width and most height of one atlas page
+ATLAS_PADDING = 2  # Empty pixels between packed images, so filtering never bleeds into a neighbour
+TICK_RATE = 60     # Simulation updates per second
+MAX_STEPS = 5      # Most simulation updates per rendered frame
+MAX_PARTICLES = 10000  # Most live particles per emitter
+SPATIAL_CELL_SIZE = 128  # Cell size of the collider index, in pixels
+SEPARATION_RADIUS = 96     # Enemies closer than this push each other apart
+SEPARATION_WEIGHT = 1.5    # How strong that push is next to steering at the player
+SEPARATION_NEIGHBOURS = 16 # Most neighbours looked at per enemy (per cell in the swarm), so crowds stay linear
+MAX_ENEMIES = 6000  # Most live enemies the spawn director allows, the frame budget lowers it on slower machines
+FRAME_BUDGET = 1 / 60  # Seconds of work per frame the spawn director holds to
+FRAME_WINDOW = 60   # Frames in the rolling frame time average
+BUDGET_HEADROOM = 0.8  # Below this share of the budget the enemy limit grows back
+USE_ENEMY_SWARM = True   # Run enemies as NumPy arrays, falls back to Enemy objects without numpy
\ No newline at end of file
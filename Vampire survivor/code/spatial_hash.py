@@ -0,0 +1,47 @@
+from settings import *
+
+class SpatialHash:
+    def __init__(self, cell_size: int = SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], list] = {}
+
+    def clear(self):
+        self.cells.clear()
+
+    def cell_range(self, rect: Rectangle) -> tuple[int, int, int, int]:
+        return (
+            int(rect.x // self.cell_size),
+            int(rect.y // self.cell_size),
+            int((rect.x + rect.width) // self.cell_size),
+            int((rect.y + rect.height) // self.cell_size)
+        )
+
+    def insert(self, item, rect: Rectangle):
+        left, top, right, bottom = self.cell_range(rect)
+        for y in range(top, bottom + 1):
+            for x in range(left, right + 1):
+                cell = self.cells.get((x, y))
+                if cell is None:
+                    self.cells[(x, y)] = [item]
+                else:
+                    cell.append(item)
+
+    def query(self, rect: Rectangle) -> list:
+        """Return every item sharing a cell with rect, each one once. Callers still do the exact test."""
+        return self.query_area(rect.x, rect.y, rect.width, rect.height)
+
+    def query_area(self, x: float, y: float, width: float, height: float) -> list:
+        # Same as query, for callers that have plain numbers and should not allocate a Rectangle
+        left, top = int(x // self.cell_size), int(y // self.cell_size)
+        right, bottom = int((x + width) // self.cell_size), int((y + height) // self.cell_size)
+        if left == right and top == bottom:
+            return self.cells.get((left, top), [])
+
+        found = {}
+        for y in range(top, bottom + 1):
+            for x in range(left, right + 1):
+                cell = self.cells.get((x, y))
+                if cell:
+                    for item in cell:
+                        found[id(item)] = item
+        return list(found.values())
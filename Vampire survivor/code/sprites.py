@@ -1,7 +1,12 @@
 from dataclasses import dataclass
 from math import atan2, degrees
 from settings import *
-import json
+import runtime
+from spatial_hash import SpatialHash
+from flow_field import FlowField
+from atlas import AtlasRegion
+from imports import load_frame_tables, strip_frames
+from timer import Timer
 
 @dataclass
 class Tile:
@@ -40,10 +45,9 @@ class Sprite:
         if debug: draw_rectangle_lines_ex(self.dest, 2, RED)
 
 class Player(Sprite):
-    def __init__(self, spritesheet: Texture, pos: Vector2, collision_sprites: list):
+    def __init__(self, spritesheet: Texture, pos: Vector2, collision_hash: SpatialHash):
         self.state, self.frame_index = 'down', 0
-        self.frames = {}
-        self.load_animation()
+        self.frames = load_frame_tables('../images/player/character_sheet.json')
 
         super().__init__(spritesheet, pos, self.frames[self.state][self.frame_index])
 
@@ -57,23 +61,7 @@ class Player(Sprite):
             self.source.width - self.hitbox_shrink.x,
             self.source.height - self.hitbox_shrink.y
         )
-        self.collision_sprites = collision_sprites
-
-    def load_animation(self):
-        with open('../images/player/character_sheet.json') as file:
-            data = json.load(file)
-
-        tags = {tag['name']: (tag['from'], tag['to']) for tag in data['meta']['frameTags']}
-        all_frames = list(data['frames'].items())
-
-        for tag_name, (start, end) in tags.items():
-            animation_frames = []
-            for i in range(start, end + 1):
-                frame_name, frame_data = all_frames[i]
-                f = frame_data['frame']
-                rect = Rectangle(f['x'], f['y'], f['w'], f['h'])
-                animation_frames.append(rect)
-            self.frames[tag_name] = animation_frames
+        self.collision_hash = collision_hash
 
     def animate(self, delta_time):
         # State
@@ -87,7 +75,7 @@ class Player(Sprite):
         self.source = self.frames[self.state][int(self.frame_index) % len(self.frames[self.state])]
 
     def collision(self, axis: str):
-        for sprite in self.collision_sprites:
+        for sprite in self.collision_hash.query(self.hitbox_rect):
             if check_collision_recs(self.hitbox_rect, sprite.dest):
                 if axis == 'x':
                     if self.direction.x > 0:
@@ -101,8 +89,8 @@ class Player(Sprite):
                         self.hitbox_rect.y = sprite.dest.y + sprite.dest.height
 
     def input(self):
-        self.direction.x = is_key_down(KEY_RIGHT) - is_key_down(KEY_LEFT)
-        self.direction.y = is_key_down(KEY_DOWN) - is_key_down(KEY_UP)
+        self.direction.x = runtime.controls.is_key_down(KEY_RIGHT) - runtime.controls.is_key_down(KEY_LEFT)
+        self.direction.y = runtime.controls.is_key_down(KEY_DOWN) - runtime.controls.is_key_down(KEY_UP)
         self.direction = vector2_normalize(self.direction)
 
     def move(self, delta_time):
@@ -130,28 +118,39 @@ class Player(Sprite):
             draw_rectangle_lines_ex(self.hitbox_rect, 2, RED)  # hitbox
 
 class Enemy(Sprite):
-    def __init__(self, tex: Texture, pos: Vector2, collision_sprites: list, player: Player):
-        self.frame_index = 0
-        self.frame_size = Vector2(tex.width / 4, tex.height)
+    def __init__(self, image: AtlasRegion, pos: Vector2, collision_hash: SpatialHash, player: Player, flow_field: FlowField, enemy_hash: SpatialHash):
         self.animation_speed = 6
-        source = Rectangle(self.frame_size.x * self.frame_index, 0, self.frame_size.x, self.frame_size.y)
-        super().__init__(tex, pos, source)
+        super().__init__(image.texture, pos, Rectangle())
 
-        self.player = player
-        self.direction = Vector2(self.player.get_center().x - self.get_center().x, self.player.get_center().y - self.get_center().y)
+        self.direction = Vector2()
         self.speed = 350
 
         self.hitbox_shrink = Vector2(20, 40)
-        self.hitbox_rect = Rectangle(
-            pos.x + self.hitbox_shrink.x / 2,
-            pos.y + self.hitbox_shrink.y / 2,
-            self.source.width - self.hitbox_shrink.x,
-            self.source.height - self.hitbox_shrink.y
-        )
-        self.collision_sprites = collision_sprites
+        self.hitbox_rect = Rectangle()
+        self.reset(image, pos, collision_hash, player, flow_field, enemy_hash)
+
+    def reset(self, image: AtlasRegion, pos: Vector2, collision_hash: SpatialHash, player: Player, flow_field: FlowField, enemy_hash: SpatialHash):
+        # Fills the existing rects, so a pooled enemy can come back as any of the enemy types
+        self.tex = image.texture
+        # The 4 animation frames side by side on the atlas
+        self.frames = strip_frames(image.width / 4, image.height, 4, image.source.x, image.source.y)
+        self.frame_index = 0
+        self.source = self.frames[0]
+        self.dest.x, self.dest.y, self.dest.width, self.dest.height = pos.x, pos.y, self.source.width, self.source.height
+
+        self.hitbox_rect.x = pos.x + self.hitbox_shrink.x / 2
+        self.hitbox_rect.y = pos.y + self.hitbox_shrink.y / 2
+        self.hitbox_rect.width = self.source.width - self.hitbox_shrink.x
+        self.hitbox_rect.height = self.source.height - self.hitbox_shrink.y
+
+        self.player = player
+        self.collision_hash = collision_hash
+        self.flow_field = flow_field
+        self.enemy_hash = enemy_hash
+        self.discard = False
 
     def collision(self, axis: str):
-        for sprite in self.collision_sprites:
+        for sprite in self.collision_hash.query(self.hitbox_rect):
             if check_collision_recs(self.hitbox_rect, sprite.dest):
                 if axis == 'x':
                     if self.direction.x > 0:
@@ -164,8 +163,40 @@ class Enemy(Sprite):
                     elif self.direction.y < 0:
                         self.hitbox_rect.y = sprite.dest.y + sprite.dest.height
 
+    def separation(self) -> Vector2:
+        """Push away from the enemies closer than SEPARATION_RADIUS, stronger the closer they are."""
+        center_x = self.hitbox_rect.x + self.hitbox_rect.width / 2
+        center_y = self.hitbox_rect.y + self.hitbox_rect.height / 2
+        radius = SEPARATION_RADIUS
+
+        push, checked = Vector2(), 0
+        for other in self.enemy_hash.query_area(center_x - radius, center_y - radius, radius * 2, radius * 2):
+            if other is self:
+                continue
+            dx = center_x - (other.hitbox_rect.x + other.hitbox_rect.width / 2)
+            dy = center_y - (other.hitbox_rect.y + other.hitbox_rect.height / 2)
+            distance = (dx * dx + dy * dy) ** 0.5
+            if distance < radius:
+                if distance == 0:
+                    dx, distance = (1 if id(self) > id(other) else -1), 1
+                strength = (1 - distance / radius) / distance
+                push.x += dx * strength
+                push.y += dy * strength
+            checked += 1
+            if checked == SEPARATION_NEIGHBOURS:
+                break
+        return push
+
     def move(self, delta_time):
-        self.direction = vector2_normalize(vector2_subtract(self.player.get_center(), self.get_center()))
+        # Follow the shared flow field, straight at the player where it has no direction
+        center = self.get_center()
+        direction = self.flow_field.direction(center.x, center.y)
+        if direction:
+            self.direction = Vector2(*direction)
+        else:
+            self.direction = vector2_normalize(vector2_subtract(self.player.get_center(), center))
+        push = self.separation()
+        self.direction = vector2_normalize(vector2_add(self.direction, vector2_scale(push, SEPARATION_WEIGHT)))
 
         self.hitbox_rect.x += self.direction.x * self.speed * delta_time
         self.collision('x')
@@ -178,7 +209,7 @@ class Enemy(Sprite):
     def update(self, delta_time):
         # Animate
         self.frame_index = self.frame_index + self.animation_speed * delta_time
-        self.source = Rectangle(self.frame_size.x * int(self.frame_index % 4), 0, self.frame_size.x, self.frame_size.y)
+        self.source = self.frames[int(self.frame_index) % 4]
 
         self.move(delta_time)
 
@@ -192,17 +223,17 @@ class Enemy(Sprite):
             draw_rectangle_lines_ex(self.hitbox_rect, 2, RED)  # hitbox
 
 class Gun(Sprite):
-    def __init__(self, tex: Texture, player: Player):
+    def __init__(self, image: AtlasRegion, player: Player):
         self.player = player
         self.distance = 140
         self.player_direction = Vector2(1, 0)
         self.rotation = 0
 
         gun_pos = vector2_add(vector2_scale(self.player_direction, self.distance), self.player.get_center())
-        super().__init__(tex, gun_pos)
+        super().__init__(image.texture, gun_pos, image.source)
 
     def get_direction(self):
-        mouse_pos = get_mouse_position()
+        mouse_pos = runtime.controls.get_mouse_position()
         player_pos = Vector2(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2)
         self.player_direction = vector2_normalize(vector2_subtract(mouse_pos, player_pos))
 
@@ -234,29 +265,33 @@ class Gun(Sprite):
             draw_rectangle_rec(self.dest, Color(0, 0, 0, 125))
 
 class Bullet(Sprite):
-    def __init__(self, tex: Texture, pos: Vector2, direction: Vector2):
-        super().__init__(tex, pos)
-        self.direction = direction
+    def __init__(self, image: AtlasRegion, pos: Vector2, direction: Vector2):
+        super().__init__(image.texture, pos, image.source)
         self.speed = 800
 
         self.origin = Vector2(self.source.width / 2, self.source.height / 2)
 
-        self.spawn_time = get_time()
         self.lifetime = 1   # 1 sec
+        self.lifetime_timer = Timer(self.lifetime, func=self.kill)
+        self.reset(image, pos, direction)
+
+    def reset(self, image: AtlasRegion, pos: Vector2, direction: Vector2):
+        self.dest.x, self.dest.y = pos.x, pos.y
+        self.direction = direction
+        self.discard = False
+        self.lifetime_timer.activate()
 
     def get_collision_rect(self):
         return Rectangle(self.dest.x - self.origin.x, self.dest.y - self.origin.y, self.dest.width, self.dest.height)
 
-    def should_discard(self):
-        if get_time() - self.spawn_time >= self.lifetime:
-            self.discard = True
+    def kill(self):
+        self.discard = True
 
     def move(self, delta_time):
         self.dest.x += self.speed * self.direction.x * delta_time
         self.dest.y += self.speed * self.direction.y * delta_time
 
     def update(self, delta_time):
-        self.should_discard()
         self.move(delta_time)
 
     def draw(self, debug: bool = False):
@@ -0,0 +1,328 @@
+from settings import *
+from flow_field import FlowField
+from atlas import AtlasRegion
+from imports import strip_frames
+
+try:
+    import numpy as np
+except ImportError:    # The swarm is optional, without numpy the game uses Enemy objects
+    np = None
+
+swarm_available = np is not None
+
+class EnemySwarm:
+    """Every enemy as one row of NumPy arrays, moved, animated and collided in batches instead of one object at a time."""
+    FIELDS = ('x', 'y', 'previous_x', 'previous_y', 'width', 'height', 'speed', 'frame', 'kind', 'dead')
+
+    def __init__(self, images: list, colliders: list, flow_field: FlowField, capacity: int = 256):
+        # Same numbers as Enemy
+        self.hitbox_shrink = Vector2(20, 40)
+        self.enemy_speed = 350
+        self.animation_speed = 6
+
+        # One kind per enemy image, each a strip of 4 frames on an atlas page
+        self.images = images
+        self.kind_ids = {id(image): kind for kind, image in enumerate(images)}
+        self.frame_width = [image.width / 4 for image in images]
+        self.frame_height = [image.height for image in images]
+        self.frames = [strip_frames(image.width / 4, image.height, 4, image.source.x, image.source.y) for image in images]
+
+        self.count = 0
+        self.x = np.zeros(capacity)    # Hitbox position, like Enemy.hitbox_rect
+        self.y = np.zeros(capacity)
+        self.previous_x = np.zeros(capacity)
+        self.previous_y = np.zeros(capacity)
+        self.width = np.zeros(capacity)
+        self.height = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.frame = np.zeros(capacity)
+        self.kind = np.zeros(capacity, dtype=np.int32)
+        self.dead = np.zeros(capacity, dtype=bool)
+
+        self.build_collider_grid(colliders)
+        self.index_dirty = True    # The cell index for bullets is rebuilt when first needed after enemies change
+
+        # Views straight into the flow field arrays, so they follow its rebuilds
+        self.flow_field = flow_field
+        self.flow_x = np.frombuffer(flow_field.direction_x, dtype=np.float32)
+        self.flow_y = np.frombuffer(flow_field.direction_y, dtype=np.float32)
+
+        # Filled by visible() and read by draw(), one entry per visible enemy
+        self.draw_x, self.draw_y, self.draw_kind, self.draw_frame = [], [], [], []
+        self.position = Vector2()
+
+    def __len__(self):
+        return self.count
+
+    def build_collider_grid(self, colliders: list):
+        # Each cell holds the indices of the colliders touching it, padded with an empty collider that overlaps nothing
+        rects = [(c.dest.x, c.dest.y, c.dest.x + c.dest.width, c.dest.y + c.dest.height) for c in colliders]
+        rects.append((np.inf, np.inf, -np.inf, -np.inf))
+        self.collider_left, self.collider_top, self.collider_right, self.collider_bottom = np.array(rects).T
+        empty = len(rects) - 1
+
+        self.cell_size = SPATIAL_CELL_SIZE
+        self.columns = int(self.collider_right[:empty].max(initial=0) // self.cell_size) + 1
+        self.rows = int(self.collider_bottom[:empty].max(initial=0) // self.cell_size) + 1
+        cells = [[] for _ in range(self.columns * self.rows)]
+        for index, (left, top, right, bottom) in enumerate(rects[:empty]):
+            for row in range(int(top // self.cell_size), int(bottom // self.cell_size) + 1):
+                for column in range(int(left // self.cell_size), int(right // self.cell_size) + 1):
+                    cells[row * self.columns + column].append(index)
+
+        depth = max(len(cell) for cell in cells)
+        self.cell_colliders = np.full((len(cells), depth), empty, dtype=np.int32)
+        for index, cell in enumerate(cells):
+            self.cell_colliders[index, :len(cell)] = cell
+
+    def grow(self):
+        for name in self.FIELDS:
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate((array, np.zeros_like(array))))
+
+    def spawn(self, image: AtlasRegion, pos: Vector2):
+        if self.count == len(self.x):
+            self.grow()
+        kind = self.kind_ids[id(image)]
+        index = self.count
+        self.x[index] = self.previous_x[index] = pos.x + self.hitbox_shrink.x / 2
+        self.y[index] = self.previous_y[index] = pos.y + self.hitbox_shrink.y / 2
+        self.width[index] = self.frame_width[kind] - self.hitbox_shrink.x
+        self.height[index] = self.frame_height[kind] - self.hitbox_shrink.y
+        self.speed[index] = self.enemy_speed
+        self.frame[index] = 0
+        self.kind[index] = kind
+        self.dead[index] = False
+        self.count += 1
+        self.index_dirty = True
+
+    def build_index(self):
+        # Enemies sorted by the cell of their hitbox corner, so the enemies of a row of cells are one slice
+        n = self.count
+        column = (self.x[:n] // self.cell_size).astype(np.int64)
+        row = (self.y[:n] // self.cell_size).astype(np.int64)
+        self.index_column = int(column.min(initial=0)) - 1
+        self.index_row = int(row.min(initial=0)) - 1
+        self.index_span = int(column.max(initial=0)) - self.index_column + 2
+        key = (row - self.index_row) * self.index_span + (column - self.index_column)
+        self.index_order = np.argsort(key, kind='stable')
+        self.index_keys = key[self.index_order]
+        self.index_reach = float(max(self.width[:n].max(initial=0), self.height[:n].max(initial=0)))
+        self.index_dirty = False
+
+    def nearby(self, left: float, top: float, right: float, bottom: float):
+        """Indices of the enemies whose hitbox may overlap the area, found through the cell index."""
+        if self.index_dirty:
+            self.build_index()
+        # A hitbox is filed under its top left cell, so look up to one hitbox further up and left
+        first_column = max(int((left - self.index_reach) // self.cell_size) - self.index_column, 0)
+        last_column = min(int(right // self.cell_size) - self.index_column, self.index_span - 1)
+        first_row = max(int((top - self.index_reach) // self.cell_size) - self.index_row, 0)
+        last_row = int(bottom // self.cell_size) - self.index_row
+        if first_column > last_column or first_row > last_row:
+            return self.index_order[:0]
+        rows = np.arange(first_row, last_row + 1) * self.index_span
+        starts = np.searchsorted(self.index_keys, rows + first_column, 'left')
+        ends = np.searchsorted(self.index_keys, rows + last_column, 'right')
+        return np.concatenate([self.index_order[start:end] for start, end in zip(starts.tolist(), ends.tolist())])
+
+    def kill_swept(self, x0: float, y0: float, x1: float, y1: float, half_width: float, half_height: float) -> bool:
+        """Mark the first enemy hit by a box of the given half size moving from (x0, y0) to (x1, y1) as dead."""
+        candidates = self.nearby(min(x0, x1) - half_width, min(y0, y1) - half_height, max(x0, x1) + half_width, max(y0, y1) + half_height)
+        candidates = candidates[~self.dead[candidates]]    # Killed earlier this tick, not removed yet
+        if not len(candidates):
+            return False
+
+        # Segment against every hitbox grown by the half size, the same slab test as segment_enter_box
+        left, top = self.x[candidates] - half_width, self.y[candidates] - half_height
+        right, bottom = left + self.width[candidates] + half_width * 2, top + self.height[candidates] + half_height * 2
+        enter, leave = np.zeros(len(candidates)), np.ones(len(candidates))
+        for start, delta, low, high in ((x0, x1 - x0, left, right), (y0, y1 - y0, top, bottom)):
+            if delta == 0:
+                inside = (low < start) & (start < high)
+                leave = np.where(inside, leave, -1)
+            else:
+                t0, t1 = (low - start) / delta, (high - start) / delta
+                enter = np.maximum(enter, np.minimum(t0, t1))
+                leave = np.minimum(leave, np.maximum(t0, t1))
+        # Only the enemy the box enters first is hit, the bullet is used up by it
+        enter = np.where(enter < leave, enter, np.inf)
+        first = int(enter.argmin())
+        if enter[first] == np.inf:
+            return False
+        self.dead[candidates[first]] = True
+        return True
+
+    def kill_farthest(self, target: Vector2):
+        n = self.count
+        distance = np.hypot(self.x[:n] + self.width[:n] / 2 - target.x, self.y[:n] + self.height[:n] / 2 - target.y)
+        distance[self.dead[:n]] = -1
+        if n and distance.max() >= 0:
+            self.dead[int(distance.argmax())] = True
+
+    def remove_dead(self):
+        n = self.count
+        alive = ~self.dead[:n]
+        kept = int(alive.sum())
+        if kept == n:
+            return
+        for name in self.FIELDS:
+            array = getattr(self, name)
+            array[:kept] = array[:n][alive]
+        self.count = kept
+        self.index_dirty = True
+
+    def store_positions(self):
+        n = self.count
+        self.previous_x[:n] = self.x[:n]
+        self.previous_y[:n] = self.y[:n]
+
+    def candidate_colliders(self, x, y, width, height):
+        # Hitboxes are smaller than a cell, so each one touches at most 2 x 2 cells
+        left = np.clip(x // self.cell_size, 0, self.columns - 1).astype(np.int32)
+        right = np.clip((x + width) // self.cell_size, 0, self.columns - 1).astype(np.int32)
+        top = np.clip(y // self.cell_size, 0, self.rows - 1).astype(np.int32)
+        bottom = np.clip((y + height) // self.cell_size, 0, self.rows - 1).astype(np.int32)
+        cells = np.stack((top * self.columns + left, top * self.columns + right, bottom * self.columns + left, bottom * self.columns + right), axis=1)
+        return self.cell_colliders[cells].reshape(len(x), -1)
+
+    def collision(self, axis: str, direction):
+        n = self.count
+        x, y, width, height = self.x[:n], self.y[:n], self.width[:n], self.height[:n]
+        candidates = self.candidate_colliders(x, y, width, height)
+        left, right = self.collider_left[candidates], self.collider_right[candidates]
+        top, bottom = self.collider_top[candidates], self.collider_bottom[candidates]
+        overlap = (x[:, None] < right) & ((x + width)[:, None] > left) & (y[:, None] < bottom) & ((y + height)[:, None] > top)
+        hit = np.flatnonzero(overlap.any(axis=1))
+        if not len(hit):
+            return
+
+        # Snap against the nearest overlapping edge in the direction of travel, like Enemy.collision.
+        # Only the few enemies touching a collider are snapped, the rest keep their position.
+        overlap = overlap[hit]
+        if axis == 'x':
+            near = np.where(overlap, left[hit], np.inf).min(axis=1) - width[hit]
+            far = np.where(overlap, right[hit], -np.inf).max(axis=1)
+            position = x
+        else:
+            near = np.where(overlap, top[hit], np.inf).min(axis=1) - height[hit]
+            far = np.where(overlap, bottom[hit], -np.inf).max(axis=1)
+            position = y
+        moving = direction[hit]
+        position[hit] = np.where(moving > 0, near, np.where(moving < 0, far, position[hit]))
+
+    def separation(self, center_x, center_y):
+        """Push away from neighbours closer than SEPARATION_RADIUS, like Enemy.separation."""
+        # Enemies are sorted by grid cell once per tick. Counting them per cell gives where each cell starts
+        # in that order, so the 3 x 3 cells around every enemy are looked up instead of searched for.
+        # At most SEPARATION_NEIGHBOURS are taken from each cell, so a pile up stays linear.
+        n, radius = len(center_x), SEPARATION_RADIUS
+        column = (center_x // radius).astype(np.int64)
+        row = (center_y // radius).astype(np.int64)
+        column -= column.min() - 1
+        row -= row.min() - 1
+        span = int(column.max()) + 2
+        key = row * span + column
+        order = np.argsort(key, kind='stable')
+        cell_count = np.bincount(key, minlength=(int(row.max()) + 2) * span)
+        cell_start = np.cumsum(cell_count) - cell_count
+
+        # From here on everything is in cell order, so each owner's pairs are one run and its neighbours are
+        # runs of the sorted positions. float32 halves the memory the pair arrays go through.
+        around = key[order][:, None] + np.array((-span - 1, -span, -span + 1, -1, 0, 1, span - 1, span, span + 1))
+        count = np.minimum(cell_count[around], SEPARATION_NEIGHBOURS).ravel()
+        start = cell_start[around].ravel()
+        other = np.repeat((start - (np.cumsum(count) - count)).astype(np.int32), count)
+        other += np.arange(len(other), dtype=np.int32)
+        owner_count = count.reshape(n, 9).sum(axis=1)
+        x, y = center_x[order].astype(np.float32), center_y[order].astype(np.float32)
+        dx = np.repeat(x, owner_count) - x[other]
+        dy = np.repeat(y, owner_count) - y[other]
+        distance = np.sqrt(dx * dx + dy * dy)
+
+        # An enemy meets itself at distance 0 and its dx stays 0. Others on the exact same spot are split
+        # along x by their index.
+        zero = np.flatnonzero(distance == 0)
+        owner_end = np.cumsum(owner_count)
+        dx[zero] = np.sign(order[np.searchsorted(owner_end, zero, 'right')] - order[other[zero]])
+        distance[zero] = 1
+
+        strength = np.maximum(1 - distance / radius, 0) / distance
+        push_x, push_y = np.empty(n), np.empty(n)
+        push_x[order] = np.add.reduceat(dx * strength, owner_end - owner_count)
+        push_y[order] = np.add.reduceat(dy * strength, owner_end - owner_count)
+        return push_x, push_y
+
+    def update(self, delta_time: float, target: Vector2):
+        n = self.count
+        if not n:
+            return
+        x, y = self.x[:n], self.y[:n]
+
+        # Seek the target, zero length directions stay zero like vector2_normalize
+        center_x, center_y = x + self.width[:n] / 2, y + self.height[:n] / 2
+        direction_x, direction_y = target.x - center_x, target.y - center_y
+        length = np.hypot(direction_x, direction_y)
+        length[length == 0] = 1
+        direction_x /= length
+        direction_y /= length
+
+        # but follow the flow field wherever it has a direction, like Enemy.move
+        field = self.flow_field
+        column = (center_x // field.tile_size).astype(np.int32)
+        row = (center_y // field.tile_size).astype(np.int32)
+        inside = (column >= 0) & (column < field.width) & (row >= 0) & (row < field.height)
+        cell = np.where(inside, row * field.width + column, 0)
+        flow_x, flow_y = self.flow_x[cell], self.flow_y[cell]
+        follow = inside & ((flow_x != 0) | (flow_y != 0))
+        direction_x = np.where(follow, flow_x, direction_x)
+        direction_y = np.where(follow, flow_y, direction_y)
+
+        push_x, push_y = self.separation(center_x, center_y)
+        direction_x += push_x * SEPARATION_WEIGHT
+        direction_y += push_y * SEPARATION_WEIGHT
+        length = np.hypot(direction_x, direction_y)
+        length[length == 0] = 1
+        direction_x /= length
+        direction_y /= length
+
+        x += direction_x * self.speed[:n] * delta_time
+        self.collision('x', direction_x)
+        y += direction_y * self.speed[:n] * delta_time
+        self.collision('y', direction_y)
+
+        self.frame[:n] += self.animation_speed * delta_time
+        self.index_dirty = True
+
+    def visible(self, view: Rectangle, alpha: float) -> list:
+        """Return (depth, index) for every enemy inside view, sorted by depth. index is what draw() takes."""
+        n = self.count
+        kind = self.kind[:n]
+        width = np.take(self.frame_width, kind)
+        height = np.take(self.frame_height, kind)
+        x = self.previous_x[:n] + (self.x[:n] - self.previous_x[:n]) * alpha - self.hitbox_shrink.x / 2
+        y = self.previous_y[:n] + (self.y[:n] - self.previous_y[:n]) * alpha - self.hitbox_shrink.y / 2
+
+        inside = np.flatnonzero((x < view.x + view.width) & (x + width > view.x) & (y < view.y + view.height) & (y + height > view.y))
+        depth = y[inside] + height[inside] / 2
+        order = inside[np.argsort(depth, kind='stable')]
+
+        self.draw_x, self.draw_y = x[order].tolist(), y[order].tolist()
+        self.draw_kind, self.draw_frame = kind[order].tolist(), self.frame[order].tolist()
+        return list(zip(np.sort(depth, kind='stable').tolist(), range(len(order))))
+
+    def draw(self, index: int, debug: bool = False):
+        kind = self.draw_kind[index]
+        source = self.frames[kind][int(self.draw_frame[index]) % 4]
+        self.position.x, self.position.y = self.draw_x[index], self.draw_y[index]
+        draw_texture_rec(self.images[kind].texture, source, self.position, WHITE)
+
+        if debug:
+            hitbox = Rectangle(
+                self.position.x + self.hitbox_shrink.x / 2,
+                self.position.y + self.hitbox_shrink.y / 2,
+                source.width - self.hitbox_shrink.x,
+                source.height - self.hitbox_shrink.y
+            )
+            draw_rectangle_lines_ex(Rectangle(self.position.x, self.position.y, source.width, source.height), 2, BLUE)
+            draw_rectangle_lines_ex(hitbox, 2, RED)
@@ -0,0 +1,32 @@
+from settings import *
+
+def get_camera_view(camera: Camera2D, margin: float = 0) -> Rectangle:
+    """World-space rectangle visible through an unrotated Camera2D, grown by margin on every side."""
+    return Rectangle(
+        camera.target.x - camera.offset.x / camera.zoom - margin,
+        camera.target.y - camera.offset.y / camera.zoom - margin,
+        get_screen_width() / camera.zoom + margin * 2,
+        get_screen_height() / camera.zoom + margin * 2
+    )
+
+def segment_enter_box(x0: float, y0: float, x1: float, y1: float, left: float, top: float, right: float, bottom: float) -> float | None:
+    """How far along the segment from (x0, y0) to (x1, y1) it enters the box, from 0 to 1, or None if it misses."""
+    enter, leave = 0.0, 1.0
+    dx, dy = x1 - x0, y1 - y0
+    if dx == 0:
+        if not left < x0 < right:
+            return None
+    else:
+        t0, t1 = (left - x0) / dx, (right - x0) / dx
+        if t0 > t1:
+            t0, t1 = t1, t0
+        enter, leave = max(enter, t0), min(leave, t1)
+    if dy == 0:
+        if not top < y0 < bottom:
+            return None
+    else:
+        t0, t1 = (top - y0) / dy, (bottom - y0) / dy
+        if t0 > t1:
+            t0, t1 = t1, t0
+        enter, leave = max(enter, t0), min(leave, t1)
+    return enter if enter < leave else None
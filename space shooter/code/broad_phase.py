@@ -0,0 +1,31 @@
+from heapq import heappush, heappop
+from operator import itemgetter
+from settings import *
+
+def sweep_and_prune(first: list, second: list) -> list:
+    """Return every (a, b) pair, a from first and b from second, whose x extents overlap.
+
+    Both lists hold (left, right, item) tuples. Everything is sorted once on its left edge and swept from
+    left to right, so only items that are still open when another one starts get paired.
+    """
+    entries = [(left, right, 0, item) for left, right, item in first]
+    entries += [(left, right, 1, item) for left, right, item in second]
+    entries.sort(key=itemgetter(0))
+
+    # Min-heaps of (right, order, item) for both sides, so closed items are popped off the front
+    open_items = ([], [])
+    pairs = []
+    for order, (left, right, side, item) in enumerate(entries):
+        for group in open_items:
+            while group and group[0][0] < left:
+                heappop(group)
+        for _, _, other in open_items[1 - side]:
+            pairs.append((item, other) if side == 0 else (other, item))
+        heappush(open_items[side], (right, order, item))
+    return pairs
+
+def circle_overlaps_rect(x: float, y: float, radius: float, rect: Rectangle) -> bool:
+    # Same test as check_collision_circle_rec, on plain floats so no Vector2 is needed
+    nearest_x = min(max(x, rect.x), rect.x + rect.width)
+    nearest_y = min(max(y, rect.y), rect.y + rect.height)
+    return (x - nearest_x) ** 2 + (y - nearest_y) ** 2 <= radius * radius
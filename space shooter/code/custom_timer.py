@@ -1,4 +1,26 @@
-from settings import get_time
+from heapq import heappush, heappop
+
+class Scheduler:
+	"""Keeps active timers in a heap ordered by when they expire, so an update only touches the due ones."""
+	def __init__(self):
+		self.time = 0.0	# Simulation time, moved on by the fixed step only
+		self.queue = []	# (due time, insertion order, timer, timer generation)
+		self.order = 0
+
+	def schedule(self, timer, due_time: float):
+		self.order += 1
+		heappush(self.queue, (due_time, self.order, timer, timer.generation))
+
+	def update(self, delta_time: float):
+		# Timers count fixed updates, so a slow frame that runs several or clamps them can't shift gameplay
+		self.time += delta_time
+		while self.queue and self.queue[0][0] <= self.time:
+			_, _, timer, generation = heappop(self.queue)
+			# Entries from before the timer was restarted or stopped are stale
+			if generation == timer.generation:
+				timer.expire()
+
+scheduler = Scheduler()
 
 class Timer:
 	def __init__(self, duration: int, repeat = False, autostart = False, func = None):
@@ -7,22 +29,24 @@ class Timer:
 		self.active = False
 		self.repeat = repeat
 		self.func = func
+		self.generation = 0
 		
 		if autostart:
 			self.activate()
 
 	def activate(self):
 		self.active = True
-		self.start_time = get_time()
+		self.start_time = scheduler.time
+		self.generation += 1
+		scheduler.schedule(self, self.start_time + self.duration)
 
 	def deactivate(self):
 		self.active = False
 		self.start_time = 0
+		self.generation += 1
 		if self.repeat:
 			self.activate()
 
-	def update(self):
-		if self.active:
-			if get_time() - self.start_time >= self.duration:
-				if self.func and self.start_time: self.func()
-				self.deactivate()
\ No newline at end of file
+	def expire(self):
+		if self.func: self.func()
+		self.deactivate()
\ No newline at end of file
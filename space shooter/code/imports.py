@@ -0,0 +1,11 @@
+from settings import *
+
+# Frame tables are tuples shared by all sprites using them, never change them
+frame_tables = {}
+
+def strip_frames(frame_width: float, frame_height: float, count: int, x: float = 0, y: float = 0) -> tuple[Rectangle, ...]:
+    """Rects of count frames laid side by side from (x, y)."""
+    key = (x, y, frame_width, frame_height, count)
+    if key not in frame_tables:
+        frame_tables[key] = tuple(Rectangle(x + i * frame_width, y, frame_width, frame_height) for i in range(count))
+    return frame_tables[key]
@@ -1,117 +1,184 @@
+import sys
+from time import perf_counter
+
+import runtime
+from runtime import ScriptedInput
 from settings import *
-from custom_timer import Timer
-from sprites import Player, Laser, Meteor, ExplosionAnimation
+from custom_timer import Timer, scheduler
+from fixed_step import FixedStep, store_positions, interpolated
+from sprites import Player, Laser, Meteor
+from pool import Pool, remove_discarded
+from broad_phase import sweep_and_prune, circle_overlaps_rect
+from starfield import Starfield
+from hud_text import CachedText
+from registry import Registry
+from particles import ParticleSystem, ParticleEmitter
+from imports import strip_frames
 
 
 class Main:
-    def __init__(self):
-        init_window(WINDOW_WIDTH, WINDOW_HEIGHT, 'Space Shooter')
+    def __init__(self, headless: bool = False, controls: ScriptedInput | None = None):
+        # Headless games have no window, use a virtual clock and scripted input and are never drawn
+        self.headless = headless
+        if headless:
+            runtime.start_headless(controls)
+        else:
+            init_window(WINDOW_WIDTH, WINDOW_HEIGHT, 'Space Shooter')
+        self.running = True
         self.debug: bool = False
 
         self.import_assets()
-        self.meteors = []
-        self.lasers = []
-        self.explosions = []
+        self.registry = Registry('laser', 'meteor', 'player')
+        self.lasers = self.registry['laser']
+        self.meteors = self.registry['meteor']
+        self.laser_pool = Pool(Laser)
+        self.meteor_pool = Pool(Meteor)
+
+        # Reused by check_collisions every tick instead of building new containers
+        self.laser_extents, self.meteor_extents = [], []
+        self.exploded = set()
+
+        # Explosions play the sprite strip at 20 frames per second, with sparks thrown out around them
+        explosion = self.assets['explosion_animation']
+        explosion_frames = strip_frames(48, 46, int(explosion.width / 48))
+        explosion_time = len(explosion_frames) / 20
+        self.particles = ParticleSystem()
+        self.explosions = self.particles.add(ParticleEmitter(
+            MAX_PARTICLES, (0, 0), (explosion_time, explosion_time), 48, WHITE, texture=explosion, frames=explosion_frames))
+        self.sparks = self.particles.add(ParticleEmitter(MAX_PARTICLES, (100, 400), (0.3, 0.8), 4, (255, 190, 80, 255), drag=2))
 
         self.meteor_timer = Timer(METEOR_TIMER_DURATION, True, True, self.create_meteor)
 
-        self.player = Player(self.assets['player'], Vector2(get_screen_width() / 2, get_screen_height() / 2), self.shoot_laser)
+        self.player = self.registry.add('player', Player(self.assets['player'], Vector2(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2), self.shoot_laser))
+
+        # Simulation runs at TICK_RATE no matter how fast frames are drawn
+        self.fixed_step = FixedStep()
 
     def import_assets(self):
         self.assets = {
-            'player': load_texture('../images/spaceship.png'),
-            'star': load_texture('../images/star.png'),
-            'laser': load_texture('../images/laser.png'),
-            'meteor': load_texture('../images/meteor.png'),
-            'explosion_animation': load_texture('../images/explosion/explosion_spritesheet.png'),
-            'font': load_font_ex('../fonts/Pixellari.ttf', FONT_SIZE, ffi.NULL, 0)
+            'player': runtime.load_texture_asset('../images/spaceship.png'),
+            'star': runtime.load_texture_asset('../images/star.png'),
+            'laser': runtime.load_texture_asset('../images/laser.png'),
+            'meteor': runtime.load_texture_asset('../images/meteor.png'),
+            'explosion_animation': runtime.load_texture_asset('../images/explosion/explosion_spritesheet.png'),
+            'font': None if self.headless else load_font_ex('../fonts/Pixellari.ttf', FONT_SIZE, ffi.NULL, 0)
         }
 
-        self.star_data = [
-            (
-                Vector2(randint(0, get_screen_width()), randint(0, get_screen_height())),  # Pos
-                uniform(0.5, 1.6)  # Size
-            ) for i in range(30)
-        ]
-
-    def draw_stars(self):
-        tex = self.assets['star']
-        source = Rectangle(0, 0, tex.width, tex.height)
-        for pos, scale in self.star_data:
-            dest = Rectangle(pos.x, pos.y, tex.width * scale, tex.height * scale)
-
-            draw_texture_pro(tex, source, dest, Vector2(), 0, WHITE)
+        # Baked into render textures, which need a window
+        self.starfield = None if self.headless else Starfield(self.assets['star'])
+        self.score_text = None if self.headless else CachedText(self.assets['font'], FONT_SIZE)
 
     def draw_score(self):
-        score = int(get_time())
-        font_size = measure_text_ex(self.assets['font'], str(score), FONT_SIZE, 0)
-        pos = Vector2(get_screen_width() / 2 - font_size.x / 2, 40)
+        # The score only changes once a second, the text is rendered then and drawn from its texture in between
+        text = self.score_text
+        pos = Vector2(get_screen_width() / 2 - text.width / 2, 40)
 
-        draw_text_ex(self.assets['font'], str(score), pos, FONT_SIZE, 0, WHITE)
+        text.draw(pos.x, pos.y)
         padding = Vector2(20, 10)
         offset_y = 5
-        text_rect = Rectangle(pos.x - padding.x / 2, pos.y - padding.y / 2 - offset_y, font_size.x + padding.x, font_size.y + padding.y)
+        text_rect = Rectangle(pos.x - padding.x / 2, pos.y - padding.y / 2 - offset_y, text.width + padding.x, text.height + padding.y)
         draw_rectangle_rounded_lines_ex(text_rect, 0.1, 0, 8, WHITE)
 
     def shoot_laser(self, pos):
-        self.lasers.append(Laser(self.assets['laser'], pos))
+        self.registry.add('laser', self.laser_pool.acquire(self.assets['laser'], pos))
 
     def create_meteor(self):
-        self.meteors.append(Meteor(self.assets['meteor']))
+        self.registry.add('meteor', self.meteor_pool.acquire(self.assets['meteor']))
 
     def discard_sprites(self):
-        self.lasers = [laser for laser in self.lasers if not laser.discard]
-        self.meteors = [meteor for meteor in self.meteors if not meteor.discard]
-        self.explosions = [explosion for explosion in self.explosions if not explosion.discard]
+        remove_discarded(self.lasers)
+        remove_discarded(self.meteors)
 
     def check_collisions(self):
+        player_center = Vector2(self.player.dest.x, self.player.dest.y)
         for meteor in self.meteors:
-            player_center = Vector2(self.player.dest.x, self.player.dest.y)
             meteor_center = Vector2(meteor.dest.x, meteor.dest.y)
             if check_collision_circles(player_center, self.player.collision_radius, meteor_center, meteor.collision_radius):
-                close_window()
-
-        for laser in self.lasers:
-            for meteor in self.meteors:
-                if check_collision_circle_rec(Vector2(meteor.dest.x, meteor.dest.y), meteor.collision_radius, laser.dest):
-                    laser.discard = True
-                    meteor.discard = True
-
-                    pos = Vector2(laser.dest.x, laser.dest.y)
-                    self.explosions.append(ExplosionAnimation(self.assets['explosion_animation'], pos, Vector2(48, 46)))
-
-    def update(self):
-        delta_time = get_frame_time()
-        if is_key_pressed(KEY_F1):
+                self.running = False
+
+        # Only pairs whose x extents overlap are tested, and a meteor explodes once however many lasers hit it
+        self.laser_extents.clear()
+        self.laser_extents.extend((laser.dest.x, laser.dest.x + laser.dest.width, laser) for laser in self.lasers)
+        self.meteor_extents.clear()
+        self.meteor_extents.extend((meteor.dest.x - meteor.collision_radius, meteor.dest.x + meteor.collision_radius, meteor) for meteor in self.meteors)
+        self.exploded.clear()
+        for laser, meteor in sweep_and_prune(self.laser_extents, self.meteor_extents):
+            if circle_overlaps_rect(meteor.dest.x, meteor.dest.y, meteor.collision_radius, laser.dest):
+                laser.discard = True
+                meteor.discard = True
+
+                if id(meteor) not in self.exploded:
+                    self.exploded.add(id(meteor))
+                    self.explosions.emit(laser.dest.x, laser.dest.y)
+                    self.sparks.emit(laser.dest.x, laser.dest.y, 24)
+
+    def input(self):
+        # Polled once per rendered frame, a fixed update can run zero or several times per frame
+        if runtime.controls.is_key_pressed(KEY_F1):
             self.debug = not self.debug
+        self.player.poll_input()
 
-        self.meteor_timer.update()
+    def update(self, delta_time):
+        scheduler.update(delta_time)
         self.discard_sprites()
 
-        for sprite in self.lasers + self.meteors + self.explosions:
+        store_positions(self.registry.dynamic())
+        for sprite in self.registry.dynamic():
             sprite.update(delta_time)
-        self.player.update(delta_time)
+        self.particles.update(delta_time)
 
         self.check_collisions()
 
-    def draw(self):
+    def draw(self, alpha):
+        self.score_text.update(int(runtime.clock.get_time()))
         begin_drawing()
         clear_background(BG_COLOR)
-        self.draw_stars()
-        for sprite in self.lasers + self.meteors + self.explosions:
-            sprite.draw(self.debug)
+        self.starfield.draw(runtime.clock.get_time())
+        with interpolated(self.registry, alpha):
+            for sprite in self.registry.dynamic('laser', 'meteor'):
+                sprite.draw(self.debug)
+            self.particles.draw(alpha)
 
-        self.player.draw(self.debug)
+            self.player.draw(self.debug)
         self.draw_score()
+        if self.debug:
+            pools = (self.laser_pool, self.meteor_pool)
+            allocated, reused = sum(pool.allocated for pool in pools), sum(pool.reused for pool in pools)
+            draw_text(f'Allocated: {allocated} Reused: {reused} Particles: {self.particles.count}', 0, 0, 20, WHITE)
+            draw_text(f'Score renders/s: {self.score_text.renders_per_second}', 0, 20, 20, WHITE)
         end_drawing()
 
     def run(self):
-        while not window_should_close():
-            self.update()
-            self.draw()
+        while self.running and not window_should_close():
+            self.input()
+            for _ in range(self.fixed_step.advance(runtime.clock.get_frame_time())):
+                self.update(self.fixed_step.delta_time)
+            self.draw(self.fixed_step.alpha)
+
+        self.starfield.unload()
+        self.score_text.unload()
         close_window()
 
+    def simulate(self, frames: int) -> int:
+        """Run up to frames virtual frames without drawing and return how many ran. Headless only."""
+        for frame in range(frames):
+            if not self.running:
+                return frame
+            runtime.clock.tick()
+            runtime.controls.tick()
+            self.input()
+            for _ in range(self.fixed_step.advance(runtime.clock.get_frame_time())):
+                self.update(self.fixed_step.delta_time)
+        return frames
+
 
 if __name__ == '__main__':
-    main = Main()
-    main.run()
+    # python main.py --headless 10000
+    if len(sys.argv) == 3 and sys.argv[1] == '--headless':
+        main = Main(headless=True)
+        start = perf_counter()
+        frames = main.simulate(int(sys.argv[2]))
+        print(f'{frames} frames in {perf_counter() - start:.2f}s')
+    else:
+        main = Main()
+        main.run()
@@ -0,0 +1,148 @@
+from array import array
+from math import cos, sin, tau
+from random import random
+from settings import *
+
+try:
+    import numpy as np
+except ImportError:    # Without numpy particles are updated one at a time, which holds far fewer per frame
+    np = None
+
+FADE_STEPS = 8  # Colours a particle fades through, so no Color is made per particle per frame
+
+class ParticleEmitter:
+    """One kind of particle. Live particles are kept field by field at the front of flat arrays.
+
+    Untextured particles are drawn as squares that fade out, textured ones play frames over their lifetime.
+    """
+    def __init__(self, capacity: int, speed: tuple, lifetime: tuple, size: float, color: Color,
+                 gravity: float = 0, drag: float = 0, texture: Texture = None, frames: tuple = None):
+        self.capacity = capacity
+        self.count = 0
+        self.speed = speed          # (min, max) in px/s, in a random direction
+        self.lifetime = lifetime    # (min, max) in seconds
+        self.size = size
+        self.gravity = gravity      # px/s² down
+        self.drag = drag            # Share of the velocity lost per second
+        self.texture = texture
+        self.frames = frames
+
+        r, g, b, a = color if isinstance(color, tuple) else (color.r, color.g, color.b, color.a)
+        self.fade = tuple(Color(r, g, b, int(a * (FADE_STEPS - step) / FADE_STEPS)) for step in range(FADE_STEPS))
+        self.position = Vector2()
+
+        self.x, self.y = array('f', bytes(4 * capacity)), array('f', bytes(4 * capacity))
+        self.velocity_x, self.velocity_y = array('f', bytes(4 * capacity)), array('f', bytes(4 * capacity))
+        self.age, self.life = array('f', bytes(4 * capacity)), array('f', bytes(4 * capacity))
+        self.fields = (self.x, self.y, self.velocity_x, self.velocity_y, self.age, self.life)
+        # NumPy views share memory with the arrays, so emit writes straight into them
+        self.views = tuple(np.frombuffer(field, dtype=np.float32) for field in self.fields) if np else None
+
+    def emit(self, x: float, y: float, count: int = 1) -> int:
+        """Start up to count particles at (x, y) and return how many fit."""
+        count = min(count, self.capacity - self.count)
+        min_speed, max_speed = self.speed
+        min_life, max_life = self.lifetime
+        for index in range(self.count, self.count + count):
+            angle, speed = random() * tau, min_speed + random() * (max_speed - min_speed)
+            self.x[index], self.y[index] = x, y
+            self.velocity_x[index], self.velocity_y[index] = cos(angle) * speed, sin(angle) * speed
+            self.age[index], self.life[index] = 0, min_life + random() * (max_life - min_life)
+        self.count += count
+        return count
+
+    def update(self, delta_time: float):
+        if not self.count:
+            return
+        if self.views:
+            self.update_batched(delta_time)
+            return
+        x, y, velocity_x, velocity_y, age, life = self.x, self.y, self.velocity_x, self.velocity_y, self.age, self.life
+        damping = max(1 - self.drag * delta_time, 0)
+        fall = self.gravity * delta_time
+        index, count = 0, self.count
+        while index < count:
+            if age[index] + delta_time >= life[index]:
+                # The last live particle takes the dead one's slot, so the live ones stay packed
+                count -= 1
+                x[index], y[index] = x[count], y[count]
+                velocity_x[index], velocity_y[index] = velocity_x[count], velocity_y[count]
+                age[index], life[index] = age[count], life[count]
+                continue
+            age[index] += delta_time
+            velocity_x[index] *= damping
+            velocity_y[index] = (velocity_y[index] + fall) * damping
+            x[index] += velocity_x[index] * delta_time
+            y[index] += velocity_y[index] * delta_time
+            index += 1
+        self.count = count
+
+    def update_batched(self, delta_time: float):
+        count = self.count
+        x, y, velocity_x, velocity_y, age, life = (view[:count] for view in self.views)
+        age += delta_time
+        alive = age < life
+        if not alive.all():
+            # Live particles are packed to the front, the rest of the arrays is free space
+            count = int(alive.sum())
+            for view in self.views:
+                view[:count] = view[:self.count][alive]
+            self.count = count
+            x, y, velocity_x, velocity_y, age, life = (view[:count] for view in self.views)
+        damping = max(1 - self.drag * delta_time, 0)
+        velocity_x *= damping
+        velocity_y += self.gravity * delta_time
+        velocity_y *= damping
+        x += velocity_x * delta_time
+        y += velocity_y * delta_time
+
+    def draw(self, alpha: float):
+        # Drawn back from the current position by the part of the step not yet reached, like interpolated sprites
+        back = (alpha - 1) / TICK_RATE
+        x, y, velocity_x, velocity_y, age, life = self.x, self.y, self.velocity_x, self.velocity_y, self.age, self.life
+
+        # The raw raylib calls skip pyray's argument wrapping, which costs more than the draw itself at this count
+        if self.frames is not None:
+            frames, position, texture = self.frames, self.position, self.texture
+            for index in range(self.count):
+                frame = frames[min(int(age[index] / life[index] * len(frames)), len(frames) - 1)]
+                position.x = x[index] + velocity_x[index] * back - frame.width / 2
+                position.y = y[index] + velocity_y[index] * back - frame.height / 2
+                DrawTextureRec(texture, frame, position, WHITE)
+        elif self.views:
+            count, fade, size = self.count, self.fade, int(self.size)
+            x, y, velocity_x, velocity_y, age, life = self.views
+            left = (x[:count] + velocity_x[:count] * back - self.size / 2).astype(np.int32).tolist()
+            top = (y[:count] + velocity_y[:count] * back - self.size / 2).astype(np.int32).tolist()
+            steps = np.minimum(age[:count] / life[:count] * FADE_STEPS, FADE_STEPS - 1).astype(np.int32).tolist()
+            for left, top, step in zip(left, top, steps):
+                DrawRectangle(left, top, size, size, fade[step])
+        else:
+            fade, size, half = self.fade, int(self.size), self.size / 2
+            for index in range(self.count):
+                color = fade[min(int(age[index] / life[index] * FADE_STEPS), FADE_STEPS - 1)]
+                DrawRectangle(int(x[index] + velocity_x[index] * back - half), int(y[index] + velocity_y[index] * back - half), size, size, color)
+
+class ParticleSystem:
+    """All emitters of a game, updated in one step and drawn one emitter after another.
+
+    Every emitter draws with a single texture, so each one is a single batch.
+    """
+    def __init__(self):
+        self.emitters = []
+
+    def add(self, emitter: ParticleEmitter) -> ParticleEmitter:
+        self.emitters.append(emitter)
+        return emitter
+
+    def update(self, delta_time: float):
+        for emitter in self.emitters:
+            emitter.update(delta_time)
+
+    def draw(self, alpha: float):
+        for emitter in self.emitters:
+            emitter.draw(alpha)
+
+    @property
+    def count(self) -> int:
+        return sum(emitter.count for emitter in self.emitters)
@@ -0,0 +1,37 @@
+from itertools import chain, islice
+
+class Registry:
+    """Every entity of a game in one list per kind, with static entities kept apart from dynamic ones.
+
+    The lists live as long as the game, so update and draw walk the same lists every frame instead of
+    concatenating new ones. Static entities never move and are never updated, only drawn or collided with.
+    """
+    def __init__(self, *kinds: str):
+        # Dynamic kinds are updated and drawn in the order given here
+        self.groups = {kind: [] for kind in kinds}
+        self.static = []
+
+    def __getitem__(self, kind: str) -> list:
+        return self.groups[kind]
+
+    def __iter__(self):
+        return self.dynamic()
+
+    def __len__(self) -> int:
+        return len(self.static) + sum(len(group) for group in self.groups.values())
+
+    def add(self, kind: str, entity):
+        self.groups[kind].append(entity)
+        return entity
+
+    def add_static(self, entity):
+        self.static.append(entity)
+        return entity
+
+    def dynamic(self, *kinds: str):
+        """Iterate the dynamic entities of kinds, or of every kind, without copying the lists.
+
+        Entities added to a kind the walk has reached, like a bullet fired in an update, are left for the next one.
+        """
+        # Each islice stops at the length its list has when the walk reaches it, chain walks them all in C
+        return chain.from_iterable(islice(self.groups[kind], len(self.groups[kind])) for kind in kinds or self.groups)
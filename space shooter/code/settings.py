@@ -9,4 +9,9 @@ PLAYER_SPEED = 500
 LASER_SPEED = 600
 METEOR_SPEED_RANGE = [300, 400]
 METEOR_TIMER_DURATION = 0.4
-FONT_SIZE = 64
\ No newline at end of file
+FONT_SIZE = 64
+TICK_RATE = 60     # Simulation updates per second
+MAX_STEPS = 5      # Most simulation updates per rendered frame
+MAX_PARTICLES = 10000  # Most live particles per emitter
+# Starfield layers, back to front: (stars, smallest scale, largest scale, scroll speed in px/s)
+STAR_LAYERS = ((400, 0.2, 0.5, 15), (120, 0.4, 0.9, 40), (30, 0.5, 1.6, 80))
\ No newline at end of file
@@ -1,3 +1,4 @@
+import runtime
 from settings import *
 
 
@@ -19,7 +20,7 @@ class Sprite:
         self.dest.y += self.direction.y * self.speed * delta_time
 
     def check_discard(self):
-        self.discard = not -300 < self.dest.y < get_screen_height() + 300
+        self.discard = not -300 < self.dest.y < WINDOW_HEIGHT + 300
 
     def update(self, delta_time):
         self.check_discard()
@@ -35,6 +36,10 @@ class Laser(Sprite):
     def __init__(self, tex: Texture, pos):
         super().__init__(tex, pos, LASER_SPEED, Vector2(0, -1))
 
+    def reset(self, tex: Texture, pos):
+        self.dest.x, self.dest.y = pos.x, pos.y
+        self.discard = False
+
     def draw(self, debug: bool):
         draw_texture_pro(self.tex, self.source, self.dest, Vector2(self.source.width / 2, self.source.height / 2), self.rotation, WHITE)
         collision_rect = Rectangle(self.dest.x - self.dest.width / 2, self.dest.y - self.dest.height / 2, self.dest.width, self.dest.height)
@@ -44,55 +49,46 @@ class Laser(Sprite):
 
 class Meteor(Sprite):
     def __init__(self, tex: Texture):
-        pos = Vector2(randint(0, get_screen_width()), randint(-150, -50))
+        pos = Vector2(randint(0, WINDOW_WIDTH), randint(-150, -50))
         speed = randint(*METEOR_SPEED_RANGE)
         direction = Vector2(uniform(-0.5, 0.5), 1)
         super().__init__(tex, pos, speed, direction)
 
-    def update(self, delta_time):
-        super().update(delta_time)
-        self.rotation += 50 * delta_time
-
-
-class ExplosionAnimation:
-    def __init__(self, sprite_strip: Texture, pos, frame_size: Vector2):
-        self.sprite_strip = sprite_strip
-        self.index = 0
-        self.frames = int(sprite_strip.width / frame_size.x)
-        self.frame_size = frame_size
-
-        self.source = Rectangle(self.frame_size.x * int(self.index), self.frame_size.y, self.frame_size.x, self.frame_size.y)
-        self.dest = Rectangle(pos.x, pos.y, frame_size.x, frame_size.y)
-
+    def reset(self, tex: Texture):
+        self.dest.x, self.dest.y = randint(0, WINDOW_WIDTH), randint(-150, -50)
+        self.speed = randint(*METEOR_SPEED_RANGE)
+        self.direction.x, self.direction.y = uniform(-0.5, 0.5), 1
+        self.rotation = 0
         self.discard = False
 
     def update(self, delta_time):
-        if self.index < self.frames - 1:
-            self.index += 20 * delta_time
-            self.source = Rectangle(self.frame_size.x * int(self.index), self.frame_size.y, self.frame_size.x, self.frame_size.y)
-        else:
-            self.discard = True
-
-    def draw(self, debug: bool):
-        draw_texture_pro(self.sprite_strip, self.source, self.dest, Vector2(self.source.width / 2, self.source.height / 2), 0, WHITE)
+        super().update(delta_time)
+        self.rotation += 50 * delta_time
 
 
 class Player(Sprite):
     def __init__(self, tex: Texture, pos, shoot_laser):
         super().__init__(tex, pos, PLAYER_SPEED, Vector2())
         self.shoot_laser = shoot_laser
+        self.shoot_queued = False
 
     def constraint(self):
-        self.dest.x = clamp(self.dest.x, self.dest.width / 2, get_screen_width() - self.dest.width / 2)
-        self.dest.y = clamp(self.dest.y, self.dest.height / 2, get_screen_height() - self.dest.height / 2)
+        self.dest.x = clamp(self.dest.x, self.dest.width / 2, WINDOW_WIDTH - self.dest.width / 2)
+        self.dest.y = clamp(self.dest.y, self.dest.height / 2, WINDOW_HEIGHT - self.dest.height / 2)
 
     def input(self):
-        self.direction.x = is_key_down(KEY_RIGHT) - is_key_down(KEY_LEFT)
-        self.direction.y = is_key_down(KEY_DOWN) - is_key_down(KEY_UP)
+        self.direction.x = runtime.controls.is_key_down(KEY_RIGHT) - runtime.controls.is_key_down(KEY_LEFT)
+        self.direction.y = runtime.controls.is_key_down(KEY_DOWN) - runtime.controls.is_key_down(KEY_UP)
         self.direction = vector2_normalize(self.direction)
 
-        if is_key_pressed(KEY_SPACE):
+        if self.shoot_queued:
             self.shoot_laser(Vector2(self.dest.x, self.dest.y - 50))
+            self.shoot_queued = False
+
+    def poll_input(self):
+        # Key presses only last one rendered frame, so they are kept until the next update
+        if runtime.controls.is_key_pressed(KEY_SPACE):
+            self.shoot_queued = True
 
     def update(self, delta_time):
         self.input()
@@ -0,0 +1,38 @@
+from settings import *
+
+class Starfield:
+    """Parallax star layers, each baked once into a window sized texture that tiles and scrolls with its source rect."""
+    def __init__(self, star: Texture, layers=STAR_LAYERS):
+        self.layers = []    # (render texture, scroll speed)
+        for count, min_scale, max_scale, speed in layers:
+            target = load_render_texture(WINDOW_WIDTH, WINDOW_HEIGHT)
+            set_texture_wrap(target.texture, TEXTURE_WRAP_REPEAT)
+
+            begin_texture_mode(target)
+            clear_background(BLANK)
+            source = Rectangle(0, 0, star.width, star.height)
+            for _ in range(count):
+                x, y, scale = randint(0, WINDOW_WIDTH), randint(0, WINDOW_HEIGHT), uniform(min_scale, max_scale)
+                # Stars over an edge are drawn again on the opposite side, so the texture tiles without seams
+                for offset_x in (0, -WINDOW_WIDTH) if x + star.width * scale > WINDOW_WIDTH else (0,):
+                    for offset_y in (0, -WINDOW_HEIGHT) if y + star.height * scale > WINDOW_HEIGHT else (0,):
+                        dest = Rectangle(x + offset_x, y + offset_y, star.width * scale, star.height * scale)
+                        draw_texture_pro(star, source, dest, Vector2(), 0, WHITE)
+            end_texture_mode()
+
+            self.layers.append((target, speed))
+
+        # Render textures are stored upside down, so the source height is negative
+        self.source = Rectangle(0, 0, WINDOW_WIDTH, -WINDOW_HEIGHT)
+        self.position = Vector2()
+
+    def draw(self, time: float):
+        # One draw call per layer, moving the source rect scrolls the repeating texture
+        for target, speed in self.layers:
+            self.source.y = (time * speed) % WINDOW_HEIGHT
+            draw_texture_rec(target.texture, self.source, self.position, WHITE)
+
+    def unload(self):
+        for target, _ in self.layers:
+            unload_render_texture(target)
+        self.layers.clear()